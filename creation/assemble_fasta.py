@@ -0,0 +1,46 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+
+from bioinfo import profiling
+from bioinfo.assembly import DEFAULT_K, assemble
+from bioinfo.fasta import FastaWriter, read_fasta
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Assemble les reads d'un fichier FASTA en séquences consensus (enregistrements Consensus_*).")
+    parser.add_argument("--input", help="Fichier FASTA en entrée (gènes et reads)")
+    parser.add_argument("--output", help="Fichier FASTA en sortie (gènes recopiés et consensus)")
+    parser.add_argument("--k", type=int, default=DEFAULT_K, help="Taille des k-mers")
+    parser.add_argument("--min_count", type=int, default=2,
+                        help="Nombre minimal d'occurrences d'un k-mer pour qu'il soit gardé dans le graphe")
+    parser.add_argument("--min_length", type=int, default=None, help="Longueur minimale des consensus (2k par défaut)")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiling.from_args(args)
+
+    profiler.mark("lecture")
+    reads = [seq for header, seq in read_fasta(args.input) if header.startswith("Read")]
+    profiler.count("reads", len(reads))
+    profiler.mark("assemblage")
+    consensus = assemble(reads, k=args.k, min_count=args.min_count, min_length=args.min_length)
+    profiler.count("consensus", len(consensus))
+
+    profiler.mark("écriture")
+    with FastaWriter(args.output) as writer:
+        for header, seq in read_fasta(args.input):
+            if header.startswith("Gene"):
+                writer.write(header, seq)
+        for i, seq in enumerate(consensus, 1):
+            writer.write(f"Consensus_{i}", seq)
+    print(f"{len(reads)} reads assemblés en {len(consensus)} consensus "
+          f"({', '.join(str(len(seq)) for seq in consensus[:5])}{' ...' if len(consensus) > 5 else ''} nt).")
+    print(f"Fichier FASTA généré : {args.output}")
+    profiler.finish()
+
+
+if __name__ == "__main__":
+    main()
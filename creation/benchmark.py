@@ -0,0 +1,226 @@
+import argparse
+import ast
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+CREATION_DIR = os.path.dirname(os.path.abspath(__file__))
+PYTHON_DIR = os.path.join(CREATION_DIR, "..", "python")
+sys.path.insert(0, PYTHON_DIR)
+sys.path.insert(0, CREATION_DIR)
+
+from bioinfo import profiling, simulate
+from bioinfo.fasta import parse_fasta
+from bioinfo.hamming import has_numpy
+from bioinfo.index import GeneIndex
+from fasta_latex import save_split_genes_to_latex
+from generate_and_verify_fasta import (generate_random_gene, generate_reads_systematic, introduce_errors,
+                                       verify_coverage, write_fasta)
+
+CORRECTION_DIR = os.path.join(PYTHON_DIR, "correction")
+
+
+def load_functions(script, names):
+    """
+    Charge seulement les fonctions `names` d'un script de correction, sans exécuter le script
+    (qui lit ses arguments et son fichier FASTA dès l'import) : le code mesuré est celui des corrections.
+    """
+    with open(script, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), script)
+    nodes = [node for node in tree.body if isinstance(node, ast.FunctionDef) and node.name in names]
+    missing = set(names) - {node.name for node in nodes}
+    if missing:
+        raise ValueError(f"Fonctions absentes de {script} : {', '.join(sorted(missing))}")
+    namespace = {}
+    exec(compile(ast.Module(body=nodes, type_ignores=[]), script, "exec"), namespace)
+    return namespace
+
+
+def measure(func, memory=True):
+    """
+    Exécute func() une fois pour le temps, puis une seconde fois sous tracemalloc pour le pic mémoire
+    (tracemalloc ralentit l'exécution : les deux mesures sont séparées).
+    :return: (temps en secondes, pic mémoire Python en octets ou None).
+    """
+    start = time.perf_counter()
+    func()
+    wall = time.perf_counter() - start
+    peak = None
+    if memory:
+        tracemalloc.start()
+        try:
+            func()
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    return wall, peak
+
+
+def make_dataset(directory, gene_length, min_read_length, max_read_length, coverage, error_rate, seed):
+    """Génère un gène, un consensus (1 % d'erreurs) et des reads, et les écrit dans un fichier FASTA."""
+    random.seed(seed)
+    gene = generate_random_gene(gene_length)
+    consensus = introduce_errors(gene, 0.01)
+    reads = generate_reads_systematic(gene, min_read_length, max_read_length, coverage, error_rate=error_rate)
+    filename = os.path.join(directory, f"bench_{gene_length}_{min_read_length}-{max_read_length}_{coverage}_{error_rate}.fasta")
+    write_fasta(filename, [("Gene_bench", gene), ("Consensus_bench", consensus)]
+                + [(header, read) for header, read, pos in reads])
+    return filename, gene, consensus, reads
+
+
+def describe(params):
+    return (f"gène {params['gene_length']} nt, reads {params['min_read_length']}-{params['max_read_length']} nt, "
+            f"couverture {params['coverage']}, erreurs {params['error_rate']}")
+
+
+def compare_to_baseline(results, baseline_filename):
+    """Affiche, pour chaque mesure présente dans les deux rapports, le rapport des temps nouveau / référence."""
+    with open(baseline_filename) as f:
+        baseline = {(r["benchmark"], json.dumps(r["dataset"], sort_keys=True)): r for r in json.load(f)["results"]}
+    for result in results:
+        old = baseline.get((result["benchmark"], json.dumps(result["dataset"], sort_keys=True)))
+        if old is not None and old["wall_time_s"]:
+            ratio = result["wall_time_s"] / old["wall_time_s"]
+            print(f"{result['benchmark']:28s} {describe(result['dataset'])}  x{ratio:.2f}", file=sys.stderr)
+
+
+def run_dataset(directory, params, verify="truth", memory=True, workers=4):
+    """
+    Mesure chaque étape sur un jeu de données ; retourne la liste des résultats.
+    La génération et verify_coverage sont mesurés avec chaque backend (Python pur, NumPy si installé),
+    et verify_coverage aussi avec `workers` processus.
+    """
+    filename, gene, consensus, reads = make_dataset(directory, **params)
+    read_seqs = [read for header, read, pos in reads]
+    read_bases = sum(len(read) for read in read_seqs)
+    file_bases = len(gene) + len(consensus) + read_bases
+
+    ex1 = load_functions(os.path.join(CORRECTION_DIR, "exercice1.py"), ["align"])
+    ex2 = load_functions(os.path.join(CORRECTION_DIR, "exercice2.py"), ["align", "align_half"])
+    ex3 = load_functions(os.path.join(CORRECTION_DIR, "exercice3.py"), ["compare"])
+    tex_filename = os.path.join(directory, "bench.tex")
+
+    def align_all():
+        index = GeneIndex(gene)
+        for read in read_seqs:
+            ex1["align"](index, read)
+
+    def align_half_all():
+        for read in read_seqs:
+            ex2["align_half"](gene, read)
+
+    def generate(rng):
+        random.seed(params["seed"])
+        generated = generate_random_gene(params["gene_length"], rng)
+        generate_reads_systematic(generated, params["min_read_length"], params["max_read_length"],
+                                  params["coverage"], error_rate=params["error_rate"], rng=rng)
+
+    use_truth = verify == "truth"
+
+    def check_coverage(pure_python=False, n_workers=1):
+        with contextlib.redirect_stdout(io.StringIO()):
+            verify_coverage(gene, reads, max_allowed_mismatches=1 if params["error_rate"] else 0,
+                            pure_python=pure_python, workers=n_workers, use_truth=use_truth)
+
+    benchmarks = [
+        ("generate[python]", lambda: generate(None), len(reads), read_bases),
+    ]
+    if has_numpy():
+        benchmarks.append(("generate[numpy]", lambda: generate(simulate.make_rng(params["seed"])),
+                           len(reads), read_bases))
+    benchmarks += [
+        ("parse_fasta", lambda: parse_fasta(filename), len(reads) + 2, file_bases),
+        ("exercice1.align", align_all, len(reads), read_bases),
+        ("exercice2.align_half", align_half_all, len(reads), read_bases),
+        ("exercice3.compare", lambda: ex3["compare"](consensus, gene), 1, len(gene)),
+        ("verify_coverage", check_coverage, len(reads), read_bases),
+        ("verify_coverage[python]", lambda: check_coverage(pure_python=True), len(reads), read_bases),
+        (f"verify_coverage[workers={workers}]", lambda: check_coverage(n_workers=workers), len(reads), read_bases),
+        ("save_split_genes_to_latex", lambda: save_split_genes_to_latex(read_seqs, tex_filename),
+         len(reads), read_bases),
+    ]
+    results = []
+    for name, func, n_reads, n_bases in benchmarks:
+        wall, peak = measure(func, memory)
+        results.append({
+            "benchmark": name,
+            "dataset": params,
+            "wall_time_s": wall,
+            "peak_memory_bytes": peak,
+            "reads": n_reads,
+            "bases": n_bases,
+            "reads_per_s": n_reads / wall if wall else None,
+            "bases_per_s": n_bases / wall if wall else None,
+        })
+        print(f"{name:28s} {describe(params)}  {wall:8.3f} s", file=sys.stderr)
+    return results
+
+
+def parse_read_lengths(text):
+    """"20-40" -> (20, 40) ; "30" -> (30, 30)."""
+    low, _, high = text.partition("-")
+    return int(low), int(high or low)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Mesure le temps, la mémoire et le débit des étapes principales sur des jeux de données simulés.")
+    parser.add_argument("--gene_lengths", type=int, nargs="+", default=[1000, 10000], help="Longueurs des gènes (nt)")
+    parser.add_argument("--read_lengths", type=parse_read_lengths, nargs="+", default=[(50, 100)],
+                        help="Intervalles de longueur des reads, ex. 20-40")
+    parser.add_argument("--coverages", type=float, nargs="+", default=[5.0], help="Couvertures")
+    parser.add_argument("--error_rates", type=float, nargs="+", default=[0.0, 0.01], help="Taux d'erreur des reads")
+    parser.add_argument("--verify", choices=["truth", "search"], default="truth",
+                        help="Mode de verify_coverage (voir generate_and_verify_fasta.py)")
+    parser.add_argument("--workers", type=int, default=4,
+                        help="Nombre de processus de la mesure verify_coverage[workers=N]")
+    parser.add_argument("--no_memory", action="store_true",
+                        help="Ne mesure pas le pic mémoire (chaque étape n'est alors exécutée qu'une fois)")
+    parser.add_argument("--seed", type=int, default=0, help="Graine aléatoire des jeux de données")
+    parser.add_argument("--output", type=str, default=None, help="Fichier JSON des résultats (sortie standard sinon)")
+    parser.add_argument("--baseline", type=str, default=None,
+                        help="Rapport JSON de référence : affiche le rapport des temps de chaque mesure")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiling.from_args(args)
+
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for gene_length in args.gene_lengths:
+            for min_read_length, max_read_length in args.read_lengths:
+                for coverage in args.coverages:
+                    for error_rate in args.error_rates:
+                        params = dict(gene_length=gene_length, min_read_length=min_read_length,
+                                      max_read_length=max_read_length, coverage=coverage,
+                                      error_rate=error_rate, seed=args.seed)
+                        profiler.mark(describe(params))
+                        results.extend(run_dataset(directory, params, args.verify, not args.no_memory, args.workers))
+
+    if args.baseline:
+        compare_to_baseline(results, args.baseline)
+
+    report = {
+        "python": platform.python_version(),
+        "numpy": has_numpy(),
+        "verify": args.verify,
+        "workers": args.workers,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Résultats : {args.output}", file=sys.stderr)
+    else:
+        print(json.dumps(report, indent=2))
+    profiler.finish()
+
+
+if __name__ == "__main__":
+    main()
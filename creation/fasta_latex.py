@@ -1,33 +1,24 @@
 import argparse
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import groupby
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
 
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
-
-
-def save_split_genes_to_latex(split_genes, output_filename):
-    """
-    Enregistre les segments d'ADN dans un fichier LaTeX avec coloration des bases.
-    """
-    latex_content = """\\documentclass{article}
+from bioinfo import profiling
+from bioinfo.fasta import read_fasta
+
+# Taille du tampon d'écriture des fichiers LaTeX (octets).
+BUFFER_SIZE = 1 << 16
+# Nombre de reads distincts dont le fragment LaTeX (mode runs) est gardé en cache.
+FRAGMENT_CACHE = 1 << 16
+# Extensions des fichiers convertis en mode dossier (éventuellement suivies de .gz).
+FASTA_EXTENSIONS = (".fasta", ".fa", ".fna", ".txt")
+COLOURS = {"A": "Acolor", "T": "Tcolor", "C": "Ccolor", "G": "Gcolor"}
+
+PREAMBLE_HEAD = """\\documentclass{article}
 \\usepackage[utf8]{inputenc}
 \\usepackage{xcolor}
 \\usepackage{tikz}
@@ -40,8 +31,11 @@ def save_split_genes_to_latex(split_genes, output_filename):
 \\definecolor{Gcolor}{rgb}{1,1,0.8}    % jaune clair
 
 % Commande pour la taille de police
-\\newcommand{\\dnafont}{\\fontsize{100pt}{70pt}\\selectfont}
+"""
 
+DNAFONT = "\\newcommand{{\\dnafont}}{{\\fontsize{{{size}pt}}{{{skip}pt}}\\selectfont}}\n"
+
+HIGHLIGHT_MACRO = """
 % Commande de coloration
 \\newcommand{\\highlightDNA}[1]{%
     \\foreach \\base in {#1} {%
@@ -53,21 +47,188 @@ def save_split_genes_to_latex(split_genes, output_filename):
         \\fi\\fi\\fi\\fi
     }%
 }
+"""
 
+BEGIN = """
 \\begin{document}
 
 \\begin{center}
     \\dnafont
     \\textbf{ASSEMBLAGE:}
 """
-    for seq in split_genes:
-        formatted_seq = ",".join(seq)
-        latex_content += f"\n    \\noindent\\highlightDNA{{{formatted_seq}}}"
 
-    latex_content += "\n\\end{center}\n\\end{document}"
+PAGE_BREAK = """
+\\end{center}
+\\newpage
+\\begin{center}
+    \\dnafont"""
+
+END = "\n\\end{center}\n\\end{document}"
+
+
+@lru_cache(maxsize=FRAGMENT_CACHE)
+def colour_runs(seq):
+    """
+    Fragment LaTeX déjà coloré d'une séquence : une \\colorbox par suite de bases identiques
+    (\\textcolor{red} pour les bases inconnues). Le fragment de chaque read distinct est gardé en cache.
+    """
+    runs = []
+    for base, run in groupby(seq):
+        text = "".join(run)
+        colour = COLOURS.get(base)
+        if colour is None:
+            runs.append(f"\\textcolor{{red}}{{{text}}}")
+        else:
+            runs.append(f"\\colorbox{{{colour}}}{{{text}}}")
+    return "".join(runs)
+
+
+def part_filename(output_filename, part):
+    """Nom de la partie `part` (à partir de 1) d'une sortie découpée : niv1.tex -> niv1.1.tex, niv1.2.tex, ..."""
+    stem, ext = os.path.splitext(output_filename)
+    return f"{stem}.{part}{ext}"
+
+
+class LatexWriter:
+    """
+    Écrit les reads colorés au fil de l'eau dans un ou plusieurs fichiers LaTeX.
+    Le préambule est écrit une fois par fichier et chaque read est écrit directement dans le fichier
+    (tampon de `buffer_size` octets) au lieu d'être ajouté à une chaîne contenant tout le document.
+    :param per_page: Nombre de reads par page (une seule page si None).
+    :param per_file: Nombre de reads par fichier ; la sortie est alors découpée en niv1.1.tex, niv1.2.tex, ...
+    :param font_size: Taille de la police des bases (pt).
+    :param mode: "foreach" : la coloration est faite par pdflatex (macro \\highlightDNA, une comparaison par base) ;
+                 "runs" : les \\colorbox sont calculées en Python et pdflatex n'a plus de test à faire.
+    """
+
+    def __init__(self, output_filename, per_page=None, per_file=None, font_size=100, mode="foreach",
+                 buffer_size=BUFFER_SIZE):
+        if mode not in ("foreach", "runs"):
+            raise ValueError(f"Mode inconnu : {mode}")
+        self.output_filename = output_filename
+        self.per_page = per_page
+        self.per_file = per_file
+        self.font_size = font_size
+        self.mode = mode
+        self.buffer_size = buffer_size
+        self.filenames = []
+        self._file = None
+        self._in_file = 0
 
-    with open(output_filename, 'w') as f:
-        f.write(latex_content)
+    def _open(self):
+        if self.per_file:
+            filename = part_filename(self.output_filename, len(self.filenames) + 1)
+        else:
+            filename = self.output_filename
+        self._file = open(filename, "w", buffering=self.buffer_size)
+        self._file.write(PREAMBLE_HEAD)
+        self._file.write(DNAFONT.format(size=self.font_size, skip=self.font_size * 7 // 10))
+        if self.mode == "foreach":
+            self._file.write(HIGHLIGHT_MACRO)
+        self._file.write(BEGIN)
+        self.filenames.append(filename)
+        self._in_file = 0
+
+    def _close_file(self):
+        if self._file is not None:
+            self._file.write(END)
+            self._file.close()
+            self._file = None
+
+    def write(self, seq):
+        """Ajoute un read au document."""
+        if self._file is not None and self.per_file and self._in_file >= self.per_file:
+            self._close_file()
+        if self._file is None:
+            self._open()
+        elif self.per_page and self._in_file % self.per_page == 0:
+            self._file.write(PAGE_BREAK)
+        if self.mode == "runs":
+            self._file.write(f"\n    \\noindent{colour_runs(seq)}")
+        else:
+            self._file.write(f"\n    \\noindent\\highlightDNA{{{','.join(seq)}}}")
+        self._in_file += 1
+
+    def close(self):
+        """Termine le document (un document vide est écrit s'il n'y a eu aucun read)."""
+        if self._file is None and not self.filenames:
+            self._open()
+        self._close_file()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def save_split_genes_to_latex(split_genes, output_filename, per_page=None, per_file=None, font_size=100,
+                              mode="foreach"):
+    """
+    Enregistre les segments d'ADN dans un fichier LaTeX avec coloration des bases.
+    :param split_genes: Séquences des segments (liste ou générateur).
+    :param per_page: Nombre de segments par page (une seule page si None).
+    :param per_file: Nombre de segments par fichier (un seul fichier si None).
+    :param font_size: Taille de la police des bases (pt).
+    :param mode: "foreach" (coloration par pdflatex) ou "runs" (coloration précalculée, voir LatexWriter).
+    :return: Liste des fichiers écrits.
+    """
+    profiler = profiling.get_profiler()
+    with LatexWriter(output_filename, per_page, per_file, font_size, mode) as writer:
+        for seq in split_genes:
+            writer.write(seq)
+            profiler.count("reads écrits")
+    return writer.filenames
+
+
+def convert_file(input_filename, output_filename, per_page=None, per_file=None, font_size=100, mode="foreach"):
+    """Convertit les "Read" d'un fichier FASTA en LaTeX ; retourne la liste des fichiers écrits."""
+    reads = (seq for header, seq in read_fasta(input_filename) if header.startswith("Read"))
+    return save_split_genes_to_latex(reads, output_filename, per_page, per_file, font_size, mode)
+
+
+def is_up_to_date(input_filename, output_filename, per_file=None):
+    """Vrai si la sortie (sa première partie si elle est découpée) est plus récente que le FASTA."""
+    if per_file:
+        output_filename = part_filename(output_filename, 1)
+    return (os.path.exists(output_filename)
+            and os.path.getmtime(output_filename) >= os.path.getmtime(input_filename))
+
+
+def convert_directory(input_dir, output_dir, workers=1, force=False, **options):
+    """
+    Convertit tous les fichiers FASTA de `input_dir` en fichiers .tex de même nom dans `output_dir`,
+    répartis sur `workers` processus. Les fichiers dont la sortie est plus récente que l'entrée
+    sont ignorés, sauf si `force` est vrai.
+    :param options: Options de convert_file (per_page, per_file, font_size, mode).
+    :return: Tuple (fichiers écrits, FASTA ignorés car déjà à jour).
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    jobs = []
+    skipped = []
+    for name in sorted(os.listdir(input_dir)):
+        stem = name[:-3] if name.endswith(".gz") else name
+        stem, ext = os.path.splitext(stem)
+        if ext not in FASTA_EXTENSIONS:
+            continue
+        input_filename = os.path.join(input_dir, name)
+        output_filename = os.path.join(output_dir, stem + ".tex")
+        if not force and is_up_to_date(input_filename, output_filename, options.get("per_file")):
+            skipped.append(input_filename)
+        else:
+            jobs.append((input_filename, output_filename))
+
+    written = []
+    if workers <= 1 or len(jobs) <= 1:
+        for input_filename, output_filename in jobs:
+            written.extend(convert_file(input_filename, output_filename, **options))
+        return written, skipped
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(convert_file, input_filename, output_filename, **options)
+                   for input_filename, output_filename in jobs]
+        for future in futures:
+            written.extend(future.result())
+    return written, skipped
 
 
 def main():
@@ -75,13 +236,40 @@ def main():
         description="Convertit un fichier FASTA en un fichier LaTeX avec coloration de séquence.")
     parser.add_argument("--input", help="Fichier FASTA en entrée")
     parser.add_argument("--output", help="Fichier LaTeX en sortie")
+    parser.add_argument("--input_dir", help="Dossier de fichiers FASTA à convertir (à la place de --input)")
+    parser.add_argument("--output_dir", help="Dossier des fichiers LaTeX produits avec --input_dir")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus entre lesquels les fichiers de --input_dir sont répartis")
+    parser.add_argument("--force", action="store_true",
+                        help="Avec --input_dir, reconvertit aussi les fichiers dont la sortie est à jour")
+    parser.add_argument("--per_page", type=int, default=None,
+                        help="Nombre de reads par page (tous sur une page par défaut)")
+    parser.add_argument("--per_file", type=int, default=None,
+                        help="Nombre de reads par fichier : la sortie est découpée en sortie.1.tex, sortie.2.tex, ...")
+    parser.add_argument("--font_size", type=int, default=100, help="Taille de la police des bases (pt)")
+    parser.add_argument("--mode", choices=["foreach", "runs"], default="foreach",
+                        help="foreach : coloration par la macro \\highlightDNA ; "
+                             "runs : \\colorbox précalculées, compilation plus rapide")
 
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiler = profiling.from_args(args)
+    profiler.mark("conversion")
+    options = dict(per_page=args.per_page, per_file=args.per_file, font_size=args.font_size, mode=args.mode)
+
+    if args.input_dir:
+        if not args.output_dir:
+            parser.error("--input_dir nécessite --output_dir")
+        written, skipped = convert_directory(args.input_dir, args.output_dir, args.workers, args.force, **options)
+        print(f"{len(written)} fichiers LaTeX générés, {len(skipped)} fichiers déjà à jour.")
+        profiler.finish()
+        return
 
-    all_sequences = parse_fasta(args.input)
-    reads = [seq for header, seq in all_sequences.items() if header.startswith("Read")]
-    save_split_genes_to_latex(reads, args.output)
+    filenames = convert_file(args.input, args.output, **options)
+    if len(filenames) > 1:
+        print(f"Fichiers LaTeX générés : {', '.join(filenames)}")
+    profiler.finish()
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,29 @@
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+
+from bioinfo import profiling
+from bioinfo.fasta import read_fasta
+from bioinfo.store import write_store
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Convertit un fichier FASTA en fichier binaire de reads, ouvert ensuite sans parsing.")
+    parser.add_argument("--input", help="Fichier FASTA en entrée (gzip accepté)")
+    parser.add_argument("--output", help="Fichier binaire en sortie")
+    profiling.add_arguments(parser)
+    args = parser.parse_args()
+    profiler = profiling.from_args(args)
+
+    profiler.mark("conversion")
+    n = write_store(args.output, read_fasta(args.input))
+    profiler.count("enregistrements", n)
+    print(f"{n} enregistrements écrits dans {args.output}")
+    profiler.finish()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,43 @@
 import random
 import math
 import argparse
+from itertools import count, islice
+import os
+import sys
 
-def generate_random_gene(length):
-    """Génère une séquence d'ADN aléatoire de la longueur spécifiée."""
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+
+from bioinfo import profiling
+from bioinfo.coverage import (add_intervals, coverage_stats, depth_from_diff, format_stats, format_strands,
+                              new_diff, strand_counts, uncovered_intervals)
+from bioinfo.fasta import FastaWriter, ShardedFastaWriter
+from bioinfo import simulate
+from bioinfo.hamming import KmerPositions, best_hamming_positions, has_numpy, origin_mismatches
+from bioinfo.index import seed_candidates
+from bioinfo.packed import as_str, reverse_complement
+from bioinfo.parallel import place_reads
+
+# Nombre de reads vérifiés à la fois.
+VERIFY_CHUNK = 50000
+
+def generate_random_gene(length, rng=None):
+    """Génère une séquence d'ADN aléatoire de la longueur spécifiée (vectorisé si un générateur NumPy est fourni)."""
+    if rng is not None:
+        return simulate.generate_random_gene(length, rng)
     return "".join(random.choice("ACGT") for _ in range(length))
 
-def introduce_errors(seq, error_rate, region=None):
+def introduce_errors(seq, error_rate, region=None, rng=None):
     """
     Introduit aléatoirement des erreurs (substitutions) dans la séquence avec un taux donné.
     :param seq: La séquence d'entrée.
     :param error_rate: Probabilité de substitution par nt.
     :param region: Tuple (start, end) indiquant la région (indices relatifs) où introduire les erreurs.
                    Si None, toute la séquence est modifiée.
+    :param rng: Générateur NumPy optionnel ; les erreurs sont alors tirées en une seule opération.
     :return: La séquence modifiée.
     """
+    if rng is not None:
+        return simulate.introduce_errors(seq, error_rate, rng, region)
     bases = "ACGT"
     seq_list = list(seq)
     if region is None:
@@ -29,18 +52,56 @@ def introduce_errors(seq, error_rate, region=None):
     return "".join(seq_list)
 
 
-def generate_reads_systematic(gene, min_read_length, max_read_length, desired_coverage, error_rate=0.0,
-                              error_region=None):
+def read_numbers(n_max):
+    """
+    Retourne une fonction i -> numéro du i-ème read, sans doublon et sans garder de liste en mémoire :
+    permutation affine i -> 100 + (a*i + b) mod m, avec a premier avec m.
+    """
+    m = max(9901, 2 * n_max)
+    a = random.randrange(1, m)
+    while math.gcd(a, m) != 1:
+        a += 1
+    b = random.randrange(m)
+    return lambda i: 100 + (a * i + b) % m
+
+
+def max_read_count(gene_length, min_read_length, max_read_length, desired_coverage):
+    """Nombre maximal de reads produits par iter_reads_systematic pour un gène."""
+    total_nt_reads = int(math.ceil(desired_coverage * gene_length))
+    n_expected = math.ceil(total_nt_reads / ((min_read_length + max_read_length) / 2))
+    return max(gene_length // max(1, min_read_length // 2) + 2, n_expected)
+
+
+def iter_reads_systematic(gene, min_read_length, max_read_length, desired_coverage, error_rate=0.0,
+                          error_region=None, rng=None, numbers=None):
     """
     Génère des reads à partir d'un gène donné de manière systématique pour garantir une couverture,
     avec une taille de read variable dans l'intervalle [min_read_length, max_read_length].
+    Si un générateur NumPy `rng` est fourni, positions, reads et erreurs sont tirés par tableaux entiers.
+    :param numbers: Itérateur des numéros des reads ; le même itérateur passé pour plusieurs gènes
+                    donne des headers uniques dans tout le fichier. Par défaut, numérotation propre au gène.
 
-    Retourne une liste de tuples (header, read, start_pos).
+    Produit les tuples (header, read, start_pos) au fur et à mesure, sans garder les reads en mémoire.
     """
+    gene = as_str(gene)
     gene_length = len(gene)
-    sys_reads = []
-    pos = 0
+    total_nt_reads = int(math.ceil(desired_coverage * gene_length))
+    n_expected = math.ceil(total_nt_reads / ((min_read_length + max_read_length) / 2))
+    if numbers is None:
+        numbers = map(read_numbers(max_read_count(gene_length, min_read_length, max_read_length,
+                                                  desired_coverage)), count())
+    i = 0
+
+    if rng is not None:
+        for positions, lengths in simulate.iter_read_layout(gene_length, min_read_length, max_read_length,
+                                                            desired_coverage, rng):
+            reads = simulate.extract_reads(gene, positions, lengths, rng, error_rate, error_region)
+            for read, pos in zip(reads, positions.tolist()):
+                yield f"Read_{next(numbers)}", read, pos
+                i += 1
+        return
 
+    pos = 0
     while pos < gene_length:
         read_length = random.randint(min_read_length, max_read_length)
         if pos + read_length > gene_length:
@@ -48,73 +109,225 @@ def generate_reads_systematic(gene, min_read_length, max_read_length, desired_co
         read = gene[pos:pos + read_length]
         if error_rate > 0.0:
             read = introduce_errors(read, error_rate, error_region)
-        sys_reads.append((None, read, pos))
+        yield f"Read_{next(numbers)}", read, pos
+        i += 1
         pos += read_length // 2
 
-
-    total_nt_reads = int(math.ceil(desired_coverage * gene_length))
-    n_total = max(len(sys_reads), math.ceil(total_nt_reads / ((min_read_length + max_read_length) / 2)))
-
-    extra_reads = []
-    while len(sys_reads) + len(extra_reads) < n_total:
+    n_total = max(i, n_expected)
+    while i < n_total:
         read_length = random.randint(min_read_length, max_read_length)
         pos = random.randint(0, gene_length - read_length)
         read = gene[pos:pos + read_length]
         if error_rate > 0.0:
             read = introduce_errors(read, error_rate, error_region)
-        extra_reads.append((None, read, pos))
+        yield f"Read_{next(numbers)}", read, pos
+        i += 1
 
-    all_reads = sys_reads + extra_reads
-    reads_with_header = []
-    for i, (h, read, pos) in enumerate(all_reads):
-        y = random.randint(100, 10000)
-        reads_with_header.append((f"Read_{y}", read, pos))
+def generate_reads_systematic(gene, min_read_length, max_read_length, desired_coverage, error_rate=0.0,
+                              error_region=None, rng=None):
+    """
+    Version liste de iter_reads_systematic.
+
+    Retourne une liste de tuples (header, read, start_pos).
+    """
+    return list(iter_reads_systematic(gene, min_read_length, max_read_length, desired_coverage,
+                                      error_rate, error_region, rng))
 
-    return reads_with_header
+def reverse_some(reads, fraction):
+    """
+    Remplace chaque read par son complément inverse avec la probabilité `fraction` (reads du brin -).
+    Produit les tuples (header, read, start_pos, brin).
+    """
+    for header, read, pos in reads:
+        strand = "+"
+        if fraction > 0.0 and random.random() < fraction:
+            read = reverse_complement(as_str(read))
+            strand = "-"
+        yield header, read, pos, strand
 
 def write_fasta(filename, sequences):
-    """Écrit les séquences dans un fichier FASTA.
+    """Écrit les séquences dans un fichier FASTA (compressé en gzip si le nom finit par .gz).
     :param filename: Nom du fichier de sortie.
     :param sequences: Liste de tuples (header, sequence).
     """
-    with open(filename, "w") as f:
+    with FastaWriter(filename) as writer:
         for header, seq in sequences:
-            f.write(f">{header}\n")
-            for i in range(0, len(seq), 80):
-                f.write(seq[i:i+80] + "\n")
+            writer.write(header, seq)
 
-def verify_coverage(gene, reads, max_allowed_mismatches=1):
+def written(reads, writer, truth=None, gene_name=None):
     """
-    Vérifie que le gène est couvert par les reads en marquant les positions recouvertes.
+    Écrit chaque read (tuples (header, read, start_pos, brin)) dans `writer` au passage,
+    puis le transmet sous forme de tuple (header, read, start_pos).
+    Si `truth` est un fichier ouvert, la position d'origine du read y est ajoutée au format BED6
+    (gène, début, fin, read, score 0, brin).
+    """
+    for header, read, pos, strand in reads:
+        writer.write(header, read)
+        if truth is not None:
+            truth.write(f"{gene_name}\t{pos}\t{pos + len(read)}\t{header}\t0\t{strand}\n")
+        yield header, read, pos
+
+def hamming_distance(s1, s2):
+    return sum(c1 != c2 for c1, c2 in zip(s1, s2))
+
+def best_position(gene, read):
+    """Retourne (position, distance) de la fenêtre du gène la plus proche du read (version Python pure)."""
+    best = None
+    best_pos = None
+    for i in range(len(gene) - len(read) + 1):
+        window = gene[i:i+len(read)]
+        d = hamming_distance(window, read)
+        if best is None or d < best:
+            best = d
+            best_pos = i
+            if best == 0:
+                break
+    return best_pos, best
+
+def search_placements(gene, read_seqs, pure_python=False, workers=1):
+    """(position, distance) de la meilleure fenêtre du gène pour chaque read, par recherche complète."""
+    profiler = profiling.get_profiler()
+    if profiler.enabled:
+        profiler.count("fenêtres comparées", sum(max(0, len(gene) - len(read) + 1) for read in read_seqs))
+    if pure_python or not has_numpy():
+        return place_reads(best_position, [gene], read_seqs, workers=workers)[0]
+    return place_reads(best_hamming_positions, [gene], read_seqs, workers=workers, batch=True)[0]
+
+def seeded_placements(gene, read_seqs, max_allowed_mismatches, pure_python=False, workers=1, seeds=None):
+    """
+    (position, distance) de la meilleure fenêtre du gène pour chaque read, en ne comparant que les
+    positions où l'un des max_allowed_mismatches + 1 morceaux du read se trouve sans erreur
+    (index.seed_candidates) : une fenêtre à au plus max_allowed_mismatches différences en fait partie.
+    (None, None) si aucune fenêtre n'est assez proche ; les reads trop courts pour être découpés
+    sont recherchés dans tout le gène.
+    :param seeds: Dictionnaire où garder l'index des k-mers du gène (NumPy), construit au premier appel
+                  et réutilisé par les paquets suivants ; sans NumPy, les morceaux sont cherchés avec str.find.
+    """
+    find = None
+    if seeds is not None and not pure_python and has_numpy():
+        if "index" not in seeds:
+            seeds["index"] = KmerPositions(gene)
+        find = seeds["index"].find
+    placements = []
+    short = []
+    compared = 0
+    for k, read in enumerate(read_seqs):
+        candidates = seed_candidates(gene, read, max_allowed_mismatches, find)
+        if candidates is None:
+            short.append(k)
+            placements.append(None)
+            continue
+        best_pos, best = None, None
+        for pos in candidates:
+            if 0 <= pos <= len(gene) - len(read):
+                compared += 1
+                d = hamming_distance(gene[pos:pos+len(read)], read)
+                if d <= max_allowed_mismatches and (best is None or d < best):
+                    best_pos, best = pos, d
+        placements.append((best_pos, best))
+    profiling.get_profiler().count("fenêtres comparées", compared)
+    if short:
+        for k, placement in zip(short, search_placements(gene, [read_seqs[k] for k in short], pure_python, workers)):
+            placements[k] = placement
+    return placements
+
+def truth_placements(gene, chunk, max_allowed_mismatches, pure_python=False, workers=1, seeds=None):
+    """
+    Placement des reads à partir de leur position d'origine : chaque read n'est comparé qu'à sa fenêtre
+    d'origine ; seuls ceux qui dépassent `max_allowed_mismatches` sont recherchés dans le gène,
+    aux positions candidates données par leurs graines exactes (seeded_placements).
+    """
+    read_seqs = [read for header, read, _ in chunk]
+    positions = [pos for header, read, pos in chunk]
+    profiling.get_profiler().count("fenêtres comparées", len(read_seqs))
+    if pure_python or not has_numpy():
+        distances = [0 if gene[pos:pos+len(read)] == read else hamming_distance(gene[pos:pos+len(read)], read)
+                     for read, pos in zip(read_seqs, positions)]
+    else:
+        distances = origin_mismatches(gene, read_seqs, positions)
+    placements = list(zip(positions, distances))
+    failed = [k for k, d in enumerate(distances) if d > max_allowed_mismatches]
+    if failed:
+        retried = seeded_placements(gene, [read_seqs[k] for k in failed], max_allowed_mismatches, pure_python,
+                                    workers, seeds)
+        for k, placement in zip(failed, retried):
+            placements[k] = placement
+    return placements
+
+def stranded_placements(gene, chunk, placements, max_allowed_mismatches, pure_python=False, workers=1,
+                        use_truth=False, seeds=None):
+    """
+    Les reads non placés sur le brin + sont placés sous forme de complément inverse (brin -).
+    Retourne les placements corrigés et le brin de chaque read.
+    """
+    strands = ["+"] * len(chunk)
+    failed = [k for k, (pos, d) in enumerate(placements) if d is None or d > max_allowed_mismatches]
+    if not failed:
+        return placements, strands
+    rc_chunk = [(header, reverse_complement(read), pos) for header, read, pos in (chunk[k] for k in failed)]
+    if use_truth:
+        retried = truth_placements(gene, rc_chunk, max_allowed_mismatches, pure_python, workers, seeds)
+    else:
+        retried = search_placements(gene, [read for header, read, _ in rc_chunk], pure_python, workers)
+    placements = list(placements)
+    for k, (pos, d) in zip(failed, retried):
+        if d is not None and (placements[k][1] is None or d < placements[k][1]):
+            placements[k] = (pos, d)
+            strands[k] = "-"
+    return placements, strands
+
+def verify_coverage(gene, reads, max_allowed_mismatches=1, pure_python=False, workers=1, chunk_size=VERIFY_CHUNK,
+                    use_truth=False, strand=False):
+    """
+    Vérifie que le gène est couvert par les reads à partir du profil de profondeur des reads placés.
+    Les distances et la profondeur sont calculées avec NumPy si disponible, sauf si pure_python est vrai,
+    et les reads sont répartis sur `workers` processus.
+    Si use_truth est vrai, la position d'origine de chaque read (start_pos) est vérifiée en premier
+    et la recherche dans tout le gène n'est faite que pour les reads qui ne s'y alignent pas.
+    Les reads (liste ou générateur) sont consommés par paquets de `chunk_size`.
+    Si strand est vrai, les reads non placés sont aussi cherchés sur le brin complémentaire
+    et le nombre de reads placés sur chaque brin est affiché.
     Retourne True si la couverture est complète, sinon False.
     """
-    gene_length = len(gene)
-    coverage = [False] * gene_length
-
-    def hamming_distance(s1, s2):
-        return sum(c1 != c2 for c1, c2 in zip(s1, s2))
-
-    for header, read, _ in reads:
-        rlen = len(read)
-        best = None
-        best_pos = None
-        for i in range(gene_length - rlen + 1):
-            window = gene[i:i+rlen]
-            d = hamming_distance(window, read)
-            if best is None or d < best:
-                best = d
-                best_pos = i
-                if best == 0:
-                    break
-        if best is not None and best <= max_allowed_mismatches:
-            for j in range(best_pos, best_pos + rlen):
-                coverage[j] = True
-
-    if all(coverage):
+    gene = as_str(gene)
+    diff = [0] * (len(gene) + 1) if pure_python else new_diff(len(gene))
+    reads = iter(reads)
+    strands_placed = {"+": 0, "-": 0}
+    # Index des k-mers du gène, construit seulement si un read doit être recherché hors de sa position d'origine.
+    seeds = {}
+    profiler = profiling.get_profiler()
+    while True:
+        chunk = [(header, as_str(read), pos) for header, read, pos in islice(reads, chunk_size)]
+        if not chunk:
+            break
+        with profiler.stage("placement des reads"):
+            if use_truth:
+                placements = truth_placements(gene, chunk, max_allowed_mismatches, pure_python, workers, seeds)
+            else:
+                placements = search_placements(gene, [read for header, read, _ in chunk], pure_python, workers)
+            if strand:
+                placements, strands = stranded_placements(gene, chunk, placements, max_allowed_mismatches,
+                                                          pure_python, workers, use_truth, seeds)
+            else:
+                strands = ["+"] * len(chunk)
+        intervals = [(best_pos, best_pos + len(read), s)
+                     for (header, read, _), (best_pos, best), s in zip(chunk, placements, strands)
+                     if best is not None and best <= max_allowed_mismatches]
+        add_intervals(diff, intervals)
+        profiler.count("reads placés", len(intervals))
+        profiler.count("reads non placés", len(chunk) - len(intervals))
+        for s, n in strand_counts(intervals).items():
+            strands_placed[s] += n
+
+    depth = depth_from_diff(diff)
+    print(f"Couverture : {format_stats(coverage_stats(depth))}")
+    if strand:
+        print(f"Reads placés : {format_strands(strands_placed)}")
+    missing = uncovered_intervals(depth)
+    if not missing:
         return True
     else:
-        missing = [i for i, cov in enumerate(coverage) if not cov]
-        print(f"Positions non couvertes : {missing[:10]}{' ...' if len(missing)>10 else ''}")
+        print(f"Régions non couvertes ({sum(end - start for start, end in missing)} nt) : {missing}")
         return False
 
 def main():
@@ -127,37 +340,75 @@ def main():
     parser.add_argument("--coverage", type=float, help="Couverture désirée pour niveaux 1 et 2")
     parser.add_argument("--error_rate_level2", type=float, help="Taux d'erreur pour le niveau 2")
     parser.add_argument("--output", type=str, help="Nom du fichier FASTA de sortie")
+    parser.add_argument("--pure_python", action="store_true",
+                        help="Génère et vérifie sans NumPy (équivaut à --pure_python_generation --pure_python_verify)")
+    parser.add_argument("--pure_python_generation", action="store_true",
+                        help="Génère le gène et les reads sans NumPy (version Python pure)")
+    parser.add_argument("--pure_python_verify", action="store_true",
+                        help="Vérifie la couverture sans NumPy (version Python pure)")
+    parser.add_argument("--seed", type=int, default=None,
+                        help="Graine aléatoire pour reproduire le même jeu de données")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Nombre de processus utilisés pour la vérification de couverture")
+    parser.add_argument("--shards", type=int, default=1,
+                        help="Découpe la sortie en N fichiers (chacun contient les gènes et une partie des reads)")
+    parser.add_argument("--verify", choices=["truth", "search"], default="truth",
+                        help="truth : vérifie chaque read à sa position d'origine (recherche complète en cas d'échec) ; "
+                             "search : recherche chaque read dans tout le gène")
+    parser.add_argument("--truth", type=str, default=None,
+                        help="Fichier BED6 où écrire la position d'origine et le brin de chaque read")
+    parser.add_argument("--reverse_fraction", type=float, default=0.0,
+                        help="Proportion des reads écrits sous forme de complément inverse (brin -) ; "
+                             "la vérification cherche alors les deux brins")
+    profiling.add_arguments(parser)
     args = parser.parse_args()
+    profiler = profiling.from_args(args)
 
-    fasta_sequences = []
-
-    # --- Niveau 1 : Reads parfaits (sans erreur) ---
-    gene1 = generate_random_gene(args.gene_length)
-    fasta_sequences.append(("Gene1_N1", gene1))
-    reads_n1 = generate_reads_systematic(gene1, args.min_read_length, args.max_read_length, args.coverage, error_rate=0.0)
-    for header, read, pos in reads_n1:
-        fasta_sequences.append((f"{header}", read))
-    print("Niveau 1 généré.")
-    if verify_coverage(gene1, reads_n1, max_allowed_mismatches=0):
-        print("Couverture complète pour Gene1_N1 (Niveau 1).")
-    else:
-        print("Couverture incomplète pour Gene1_N1 (Niveau 1).")
-
-    # --- Niveau 2 : Reads avec erreur isolée dans une moitiée ---
-    gene2 = generate_random_gene(args.gene_length)
-    fasta_sequences.append(("Gene2_N2", gene2))
-    error_region = (0, 15 // 2)
-    reads_n2 = generate_reads_systematic(gene2, args.min_read_length, args.max_read_length, args.coverage, error_rate=args.error_rate_level2, error_region=error_region)
-    for header, read, pos in reads_n2:
-        fasta_sequences.append((f"{header}", read))
-    print("Niveau 2 généré.")
-    if verify_coverage(gene2, reads_n2, max_allowed_mismatches=1):
-        print("Couverture complète pour Gene2_N2 (Niveau 2).")
-    else:
-        print("Couverture incomplète pour Gene2_N2 (Niveau 2).")
+    random.seed(args.seed)
+    pure_generation = args.pure_python or args.pure_python_generation
+    pure_verify = args.pure_python or args.pure_python_verify
+    rng = None if pure_generation or not simulate.has_numpy() else simulate.make_rng(args.seed)
+
+    # Une seule numérotation pour les deux niveaux : les headers des reads sont uniques dans tout le fichier.
+    numbers = map(read_numbers(2 * max_read_count(args.gene_length, args.min_read_length, args.max_read_length,
+                                                  args.coverage)), count())
+
+    truth = open(args.truth, "w") if args.truth else None
+    use_truth = args.verify == "truth"
+    strand = args.reverse_fraction > 0.0
+    with ShardedFastaWriter(args.output, args.shards) as writer:
+        # --- Niveau 1 : Reads parfaits (sans erreur) ---
+        profiler.mark("niveau 1")
+        gene1 = generate_random_gene(args.gene_length, rng)
+        writer.write_all("Gene1_N1", gene1)
+        reads_n1 = iter_reads_systematic(gene1, args.min_read_length, args.max_read_length, args.coverage, error_rate=0.0, rng=rng, numbers=numbers)
+        reads_n1 = reverse_some(reads_n1, args.reverse_fraction)
+        complete = verify_coverage(gene1, written(reads_n1, writer, truth, "Gene1_N1"), max_allowed_mismatches=0, pure_python=pure_verify, workers=args.workers, use_truth=use_truth, strand=strand)
+        print("Niveau 1 généré.")
+        if complete:
+            print("Couverture complète pour Gene1_N1 (Niveau 1).")
+        else:
+            print("Couverture incomplète pour Gene1_N1 (Niveau 1).")
+
+        # --- Niveau 2 : Reads avec erreur isolée dans une moitiée ---
+        profiler.mark("niveau 2")
+        gene2 = generate_random_gene(args.gene_length, rng)
+        writer.write_all("Gene2_N2", gene2)
+        error_region = (0, 15 // 2)
+        reads_n2 = iter_reads_systematic(gene2, args.min_read_length, args.max_read_length, args.coverage, error_rate=args.error_rate_level2, error_region=error_region, rng=rng, numbers=numbers)
+        reads_n2 = reverse_some(reads_n2, args.reverse_fraction)
+        complete = verify_coverage(gene2, written(reads_n2, writer, truth, "Gene2_N2"), max_allowed_mismatches=1, pure_python=pure_verify, workers=args.workers, use_truth=use_truth, strand=strand)
+        print("Niveau 2 généré.")
+        if complete:
+            print("Couverture complète pour Gene2_N2 (Niveau 2).")
+        else:
+            print("Couverture incomplète pour Gene2_N2 (Niveau 2).")
 
-    write_fasta(args.output, fasta_sequences)
-    print(f"Fichier FASTA généré : {args.output}")
+    print(f"Fichier FASTA généré : {', '.join(writer.filenames)}")
+    if truth is not None:
+        truth.close()
+        print(f"Positions d'origine des reads : {args.truth}")
+    profiler.finish()
 
 if __name__ == "__main__":
     main()
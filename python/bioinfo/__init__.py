@@ -0,0 +1 @@
+"""Outils partagés par les scripts de l'atelier (lecture FASTA, alignement, ...)."""
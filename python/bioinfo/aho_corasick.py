@@ -0,0 +1,80 @@
+"""Automate d'Aho-Corasick : recherche de nombreux motifs (reads) en un seul passage sur un gène."""
+from collections import deque
+
+from .packed import as_str
+
+
+class AhoCorasick:
+    """
+    Automate construit à partir de motifs associés chacun à une valeur (ex. l'indice du read).
+    Après `build()`, `iter_hits(texte)` parcourt le texte une seule fois et produit
+    toutes les occurrences (début, valeur) de tous les motifs.
+    """
+
+    def __init__(self):
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        self.dict_link = [0]
+        self.built = False
+
+    def add(self, pattern, value):
+        """Ajoute un motif ; plusieurs motifs identiques peuvent porter des valeurs différentes."""
+        if self.built:
+            raise RuntimeError("Automate déjà construit : impossible d'ajouter un motif.")
+        pattern = as_str(pattern)
+        if not pattern:
+            return
+        node = 0
+        for c in pattern:
+            nxt = self.goto[node].get(c)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][c] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+                self.dict_link.append(0)
+            node = nxt
+        self.out[node].append((len(pattern), value))
+
+    def build(self):
+        """Calcule les liens d'échec (parcours en largeur du trie)."""
+        goto, fail, out, dict_link = self.goto, self.fail, self.out, self.dict_link
+        queue = deque(goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for c, child in goto[node].items():
+                f = fail[node]
+                while f and c not in goto[f]:
+                    f = fail[f]
+                target = goto[f].get(c, 0)
+                fail[child] = target if target != child else 0
+                dict_link[child] = fail[child] if out[fail[child]] else dict_link[fail[child]]
+                queue.append(child)
+        self.built = True
+
+    def iter_hits(self, text):
+        """Produit les couples (début, valeur) de chaque occurrence, par position de fin croissante."""
+        if not self.built:
+            self.build()
+        text = as_str(text)
+        goto, fail, out, dict_link = self.goto, self.fail, self.out, self.dict_link
+        node = 0
+        for end, c in enumerate(text, 1):
+            while node and c not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(c, 0)
+            match = node if out[node] else dict_link[node]
+            while match:
+                for length, value in out[match]:
+                    yield end - length, value
+                match = dict_link[match]
+
+    def first_hits(self, text):
+        """Retourne {valeur: position de la première occurrence} pour les motifs trouvés dans `text`."""
+        first = {}
+        for start, value in self.iter_hits(text):
+            if value not in first or start < first[value]:
+                first[value] = start
+        return first
@@ -0,0 +1,201 @@
+"""
+Assemblage des reads en contigs (graphe de De Bruijn) puis consensus par vote majoritaire.
+Les contigs sont les unitigs du graphe des k-mers solides (les k-mers rares, dus aux erreurs
+de séquençage, sont écartés) : chacun s'arrête au premier embranchement. Chaque read est
+ensuite replacé sur les contigs dont il partage un k-mer pour voter base par base, puis les
+contigs qui se chevauchent sont fusionnés.
+"""
+from collections import Counter
+
+from .index import GeneIndex
+from .packed import as_str
+
+DEFAULT_K = 15
+BASES = "ACGT"
+
+
+def count_kmers(reads, k):
+    """Compte les k-mers de toutes les séquences de `reads`."""
+    counts = Counter()
+    for seq in reads:
+        counts.update(seq[i:i + k] for i in range(len(seq) - k + 1))
+    return counts
+
+
+def _neighbours(kmer, solid, forward):
+    """K-mers solides qui suivent (forward) ou précèdent `kmer` dans le graphe de De Bruijn."""
+    if forward:
+        candidates = [kmer[1:] + c for c in BASES]
+    else:
+        candidates = [c + kmer[:-1] for c in BASES]
+    return [c for c in candidates if c in solid]
+
+
+def _extend(seed, solid, used, forward):
+    """
+    Prolonge le contig depuis `seed` tant que le chemin ne se ramifie pas : le k-mer courant
+    n'a qu'un seul voisin solide, et ce voisin n'a que le k-mer courant pour voisin en sens inverse.
+    À un embranchement (répétition, ou erreur vue plusieurs fois) le contig s'arrête, pour
+    ne pas raccorder deux régions différentes.
+    """
+    bases = []
+    cur = seed
+    while True:
+        candidates = _neighbours(cur, solid, forward)
+        if len(candidates) != 1:
+            break
+        nxt = candidates[0]
+        if nxt in used or len(_neighbours(nxt, solid, not forward)) != 1:
+            break
+        cur = nxt
+        used.add(cur)
+        bases.append(cur[-1] if forward else cur[0])
+    return "".join(bases)
+
+
+def greedy_contigs(counts, min_count=2):
+    """
+    Construit les unitigs du graphe de De Bruijn des k-mers solides (vus au moins `min_count` fois) :
+    on part du k-mer le plus fréquent encore libre, on l'étend à droite puis à gauche jusqu'au
+    premier embranchement, et on recommence tant qu'il reste des k-mers solides libres.
+    """
+    solid = {kmer for kmer, n in counts.items() if n >= min_count}
+    used = set()
+    contigs = []
+    for seed, n in sorted(counts.items(), key=lambda item: item[1], reverse=True):
+        if n < min_count:
+            break
+        if seed in used:
+            continue
+        used.add(seed)
+        right = _extend(seed, solid, used, forward=True)
+        left = _extend(seed, solid, used, forward=False)
+        contigs.append(left[::-1] + seed + right)
+    return contigs
+
+
+def place_on_contig(index, read_seq, max_mismatches):
+    """
+    Position du read sur le contig indexé, à partir de ses k-mers (le read peut déborder du contig).
+    :return: Position (éventuellement négative) ou None si le read ne s'aligne pas.
+    """
+    contig, k = index.gene, index.k
+    for offset in range(0, len(read_seq) - k + 1):
+        hits = index.kmers.get(read_seq[offset:offset + k])
+        if not hits:
+            continue
+        for hit in hits:
+            start = hit - offset
+            lo, hi = max(start, 0), min(start + len(read_seq), len(contig))
+            mismatches = sum(a != b for a, b in zip(contig[lo:hi], read_seq[lo - start:hi - start]))
+            if mismatches <= max_mismatches:
+                return start
+        return None
+    return None
+
+
+def consensus_sequences(contigs, reads, k=DEFAULT_K, max_mismatches=3):
+    """
+    Consensus de chaque contig (voir majority_consensus) en un seul passage sur les reads.
+    Les k-mers de tous les contigs sont indexés une fois : un read n'est replacé que sur
+    les contigs dont il partage au moins un k-mer.
+    """
+    indexes = [GeneIndex(contig, k) for contig in contigs]
+    owners = {}
+    for j, index in enumerate(indexes):
+        for kmer in index.kmers:
+            owners.setdefault(kmer, []).append(j)
+    columns = [{} for _ in contigs]
+    for read_seq in reads:
+        candidates = set()
+        for offset in range(0, len(read_seq) - k + 1):
+            candidates.update(owners.get(read_seq[offset:offset + k], ()))
+        for j in sorted(candidates):
+            start = place_on_contig(indexes[j], read_seq, max_mismatches)
+            if start is None:
+                continue
+            for i, base in enumerate(read_seq, start):
+                columns[j].setdefault(i, Counter())[base] += 1
+    consensus = []
+    for contig, contig_columns in zip(contigs, columns):
+        if not contig_columns:
+            consensus.append(contig)
+            continue
+        first, last = min(contig_columns), max(contig_columns)
+        consensus.append("".join(contig_columns[i].most_common(1)[0][0] if i in contig_columns else contig[i]
+                                 for i in range(first, last + 1)))
+    return consensus
+
+
+def majority_consensus(contig, reads, k=DEFAULT_K, max_mismatches=3):
+    """
+    Replace chaque read sur le contig et retourne la séquence consensus (base majoritaire de chaque colonne).
+    Les reads qui débordent du contig l'allongent.
+    """
+    return consensus_sequences([contig], reads, k, max_mismatches)[0]
+
+
+def merge_overlaps(contigs, k=DEFAULT_K, max_mismatch_rate=0.1):
+    """
+    Fusionne les contigs dont la fin chevauche le début d'un autre (au moins k bases, avec
+    au plus `max_mismatch_rate` de différences). Le début de chaque contig est indexé par deux
+    graines consécutives de k/2 bases, pour qu'une erreur en bout de contig n'empêche pas la fusion ;
+    chaque contig n'est ensuite parcouru qu'une fois.
+    """
+    seed = max(1, k // 2)
+    starts = {}
+    for j, contig in enumerate(contigs):
+        if len(contig) >= k:
+            for offset in (0, seed):
+                starts.setdefault(contig[offset:offset + seed], []).append((j, offset))
+    successor = {}
+    has_predecessor = set()
+    for i, a in enumerate(contigs):
+        for q in range(1, len(a) - seed + 1):
+            for j, offset in starts.get(a[q:q + seed], ()):
+                b = contigs[j]
+                p = q - offset
+                overlap = len(a) - p
+                if p < 1 or overlap < k or j == i or j in has_predecessor or len(b) <= overlap:
+                    continue
+                if sum(x != y for x, y in zip(a[p:], b)) <= max_mismatch_rate * overlap:
+                    successor[i] = (j, overlap)
+                    has_predecessor.add(j)
+                    break
+            if i in successor:
+                break
+
+    merged = []
+    done = set()
+    for i in range(len(contigs)):
+        if i in has_predecessor or i in done:
+            continue
+        seq = contigs[i]
+        done.add(i)
+        while i in successor and successor[i][0] not in done:
+            j, overlap = successor[i]
+            seq += contigs[j][overlap:]
+            done.add(j)
+            i = j
+        merged.append(seq)
+    # Contigs restés dans un cycle de chevauchements : gardés tels quels.
+    merged.extend(contigs[i] for i in range(len(contigs)) if i not in done)
+    return merged
+
+
+def assemble(reads, k=DEFAULT_K, min_count=2, min_length=None):
+    """
+    Assemble des reads en contigs consensus.
+    :param reads: Séquences des reads (liste : elle est parcourue deux fois).
+    :param k: Taille des k-mers du graphe de De Bruijn.
+    :param min_count: Nombre minimal d'occurrences pour qu'un k-mer soit gardé.
+    :param min_length: Longueur minimale des contigs gardés (2k par défaut).
+    :return: Liste des consensus, du plus long au plus court.
+    """
+    reads = [as_str(read) for read in reads]
+    if min_length is None:
+        min_length = 2 * k
+    counts = count_kmers(reads, k)
+    contigs = sorted((c for c in greedy_contigs(counts, min_count) if len(c) >= min_length), key=len, reverse=True)
+    consensus = merge_overlaps(consensus_sequences(contigs, reads, k), k)
+    return sorted(consensus, key=len, reverse=True)
@@ -0,0 +1,89 @@
+"""
+Distance d'édition en bande (Ukkonen) entre deux séquences, avec CIGAR.
+Seules les cases à moins de `d` de la diagonale sont calculées, et `d` est doublé tant que la
+distance trouvée dépasse la bande : le coût est O(n * distance) au lieu de O(n * m).
+"""
+from .packed import as_str
+
+INF = float("inf")
+
+
+def _band(query, ref, d):
+    """
+    Remplit la bande de largeur `d` ; retourne les lignes (début de colonne, valeurs) ou None
+    si toute une ligne dépasse `d` (la distance est alors forcément supérieure).
+    """
+    n, m = len(query), len(ref)
+    rows = [(0, list(range(0, min(m, d) + 1)))]
+    for i in range(1, n + 1):
+        prev_lo, prev = rows[-1]
+        lo, hi = max(0, i - d), min(m, i + d)
+        row = [INF] * (hi - lo + 1)
+        qc = query[i - 1]
+        for j in range(lo, hi + 1):
+            k = j - prev_lo
+            best = prev[k] + 1 if 0 <= k < len(prev) else INF
+            if j > lo:
+                best = min(best, row[j - lo - 1] + 1)
+            elif j == 0:
+                best = min(best, i)
+            if j > 0 and 0 <= k - 1 < len(prev):
+                best = min(best, prev[k - 1] + (qc != ref[j - 1]))
+            row[j - lo] = best
+        if min(row) > d:
+            return None
+        rows.append((lo, row))
+    return rows
+
+
+def _value(rows, i, j):
+    lo, row = rows[i]
+    k = j - lo
+    return row[k] if 0 <= k < len(row) else INF
+
+
+def _cigar(rows, query, ref):
+    """Remonte la bande depuis la dernière case et retourne le CIGAR compact (M, I, D)."""
+    i, j = len(query), len(ref)
+    ops = []
+    while i > 0 or j > 0:
+        cur = _value(rows, i, j)
+        if i > 0 and j > 0 and cur == _value(rows, i - 1, j - 1) + (query[i - 1] != ref[j - 1]):
+            ops.append("M")
+            i, j = i - 1, j - 1
+        elif i > 0 and cur == _value(rows, i - 1, j) + 1:
+            ops.append("I")
+            i -= 1
+        else:
+            ops.append("D")
+            j -= 1
+    cigar = []
+    for op in reversed(ops):
+        if cigar and cigar[-1][1] == op:
+            cigar[-1][0] += 1
+        else:
+            cigar.append([1, op])
+    return "".join(f"{count}{op}" for count, op in cigar)
+
+
+def banded_align(query, ref, max_distance):
+    """
+    Alignement global de `query` (ex. consensus) sur `ref` (ex. gène) par distance d'édition.
+    :param max_distance: Distance au-delà de laquelle le calcul s'arrête.
+    :return: (distance, CIGAR) — I : base en trop dans query, D : base manquante — ou None
+             si la distance dépasse `max_distance`.
+    """
+    query, ref = as_str(query), as_str(ref)
+    if abs(len(query) - len(ref)) > max_distance:
+        return None
+    d = max(1, abs(len(query) - len(ref)))
+    while True:
+        d = min(d, max_distance)
+        rows = _band(query, ref, d)
+        if rows is not None:
+            distance = _value(rows, len(query), len(ref))
+            if distance <= d:
+                return int(distance), _cigar(rows, query, ref)
+        if d >= max_distance:
+            return None
+        d *= 2
@@ -0,0 +1,181 @@
+"""
+Recherche approchée bit-parallèle d'un read dans un gène.
+Les vecteurs de bits sont des entiers Python : la longueur du read n'est pas limitée à 64.
+- mismatch_hits : au plus k substitutions (Baeza-Yates / Wu-Manber, Shift-And).
+- edit_hits : distance d'édition au plus k (Myers), insertions et délétions comprises.
+Le parcours bit-parallèle n'est fait que sur les fenêtres du texte autour des graines exactes
+(k + 1 morceaux du read, voir index.seed_candidates), le texte entier seulement pour les reads trop courts.
+"""
+from .index import seed_candidates
+from .packed import as_str
+
+
+def _pattern_masks(pattern):
+    masks = {}
+    for i, c in enumerate(pattern):
+        masks[c] = masks.get(c, 0) | (1 << i)
+    return masks
+
+
+def _seed_windows(text, pattern, k, margin):
+    """
+    Fenêtres (début, fin) du texte qui contiennent toutes les occurrences à au plus k erreurs :
+    autour de chaque début candidat, `margin` bases de part et d'autre ; les fenêtres qui se touchent
+    sont fusionnées. Retourne None si le read est trop court pour être découpé.
+    """
+    candidates = seed_candidates(text, pattern, k)
+    if candidates is None:
+        return None
+    windows = []
+    for start in candidates:
+        begin = max(0, start - margin)
+        end = min(len(text), start + len(pattern) + margin)
+        if begin >= end:
+            continue
+        if windows and begin <= windows[-1][1]:
+            windows[-1][1] = max(windows[-1][1], end)
+        else:
+            windows.append([begin, end])
+    return windows
+
+
+def _windowed(search, text, pattern, k, margin):
+    """Applique search(texte, pattern, k) aux seules fenêtres de _seed_windows et recale les positions."""
+    windows = _seed_windows(text, pattern, k, margin)
+    if windows is None:
+        return search(text, pattern, k)
+    hits = []
+    for begin, end in windows:
+        hits.extend((start + begin, stop + begin, d) for start, stop, d in search(text[begin:end], pattern, k))
+    return hits
+
+
+def mismatch_hits(text, pattern, k):
+    """
+    Cherche toutes les fenêtres de `text` à au plus `k` substitutions de `pattern`.
+    :return: Liste de tuples (début, fin, nombre de différences), fin exclue.
+    """
+    text, pattern = as_str(text), as_str(pattern)
+    if not pattern or len(pattern) > len(text):
+        return []
+    return _windowed(_mismatch_scan, text, pattern, k, 0)
+
+
+def _mismatch_scan(text, pattern, k):
+    m = len(pattern)
+    if m == 0 or m > len(text):
+        return []
+    masks = _pattern_masks(pattern)
+    high = 1 << (m - 1)
+    full = (1 << m) - 1
+    states = [0] * (k + 1)
+    hits = []
+    for end, c in enumerate(text, 1):
+        eq = masks.get(c, 0)
+        prev_old = 0
+        for j in range(k + 1):
+            old = states[j]
+            new = ((old << 1) | 1) & eq
+            if j:
+                new |= (prev_old << 1) | 1
+            states[j] = new & full
+            prev_old = old
+        if end >= m:
+            for j in range(k + 1):
+                if states[j] & high:
+                    hits.append((end - m, end, j))
+                    break
+    return hits
+
+
+def _edit_start(text, pattern, end, distance):
+    """
+    Retrouve le début de l'alignement finissant en `end` : distance d'édition entre le read et chaque
+    fin du texte, calculée de droite à gauche avec les mêmes vecteurs de bits que edit_hits,
+    mais ancrée en `end` (le bit de la ligne 0 entre à chaque pas).
+    """
+    m = len(pattern)
+    window = text[max(0, end - m - distance):end][::-1]
+    masks = _pattern_masks(pattern[::-1])
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    best_len, best_d = 0, m
+    for j, c in enumerate(window, 1):
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = ((ph << 1) | 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        if score < best_d or (score == best_d and abs(j - m) < abs(best_len - m)):
+            best_len, best_d = j, score
+    if m < best_d:
+        best_len = 0
+    return end - best_len
+
+
+def edit_hits(text, pattern, k):
+    """
+    Cherche les occurrences de `pattern` dans `text` à distance d'édition au plus `k` (algorithme de Myers).
+    Pour une suite de fins consécutives, seule la meilleure est gardée.
+    :return: Liste de tuples (début, fin, distance), fin exclue.
+    """
+    text, pattern = as_str(text), as_str(pattern)
+    if not pattern:
+        return []
+    # Avec des indels, le morceau exact peut être décalé de k bases et la fin de l'alignement de 2k ;
+    # _edit_start relit encore k bases avant le début.
+    return _windowed(_edit_scan, text, pattern, k, 3 * k)
+
+
+def _edit_scan(text, pattern, k):
+    m = len(pattern)
+    if m == 0:
+        return []
+    masks = _pattern_masks(pattern)
+    full = (1 << m) - 1
+    high = 1 << (m - 1)
+    pv, mv, score = full, 0, m
+    ends = []
+    for end, c in enumerate(text, 1):
+        eq = masks.get(c, 0)
+        xv = eq | mv
+        xh = (((eq & pv) + pv) ^ pv) | eq
+        ph = mv | (~(xh | pv) & full)
+        mh = pv & xh
+        if ph & high:
+            score += 1
+        elif mh & high:
+            score -= 1
+        ph = (ph << 1) & full
+        mh = (mh << 1) & full
+        pv = mh | (~(xv | ph) & full)
+        mv = ph & xv
+        if score <= k:
+            ends.append((end, score))
+
+    hits = []
+    run = []
+    for end, score in ends + [(None, None)]:
+        if run and (end is None or end != run[-1][0] + 1):
+            best_end, best_score = min(run, key=lambda e: e[1])
+            hits.append((_edit_start(text, pattern, best_end, best_score), best_end, best_score))
+            run = []
+        if end is not None:
+            run.append((end, score))
+    return hits
+
+
+def best_hit(hits):
+    """Retourne la meilleure occurrence (moins de différences, puis la plus à gauche), ou None."""
+    if not hits:
+        return None
+    return min(hits, key=lambda h: (h[2], h[0]))
@@ -0,0 +1,125 @@
+"""
+Couverture d'une séquence par des intervalles (reads placés) par balayage :
+chaque intervalle ajoute +1 à son début et -1 à sa fin dans un tableau de différences,
+une somme cumulée donne ensuite la profondeur de chaque base en O(reads + longueur).
+Les intervalles peuvent porter un troisième champ, le brin ("+" ou "-") du read placé.
+Avec NumPy, les tableaux sont des ndarray et chaque étape est vectorisée ; sinon ce sont des listes.
+"""
+from itertools import accumulate
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def new_diff(length):
+    """Tableau de différences vide pour une séquence de `length` bases (ndarray si NumPy est disponible)."""
+    if np is not None:
+        return np.zeros(length + 1, dtype=np.int64)
+    return [0] * (length + 1)
+
+
+def add_intervals(diff, intervals):
+    """Ajoute les événements +1/-1 des intervalles (début, fin) au tableau de différences `diff`."""
+    length = len(diff) - 1
+    if np is not None and isinstance(diff, np.ndarray):
+        bounds = np.array([interval[:2] for interval in intervals], dtype=np.int64).reshape(-1, 2)
+        starts = np.maximum(bounds[:, 0], 0)
+        ends = np.minimum(bounds[:, 1], length)
+        keep = starts < ends
+        diff += np.bincount(starts[keep], minlength=length + 1)
+        diff -= np.bincount(ends[keep], minlength=length + 1)
+        return
+    for start, end, *_ in intervals:
+        start = max(start, 0)
+        end = min(end, length)
+        if start < end:
+            diff[start] += 1
+            diff[end] -= 1
+
+
+def depth_from_diff(diff):
+    """Profondeur de chaque position à partir du tableau de différences (somme cumulée)."""
+    if np is not None and isinstance(diff, np.ndarray):
+        return np.cumsum(diff[:-1])
+    return list(accumulate(diff[:-1]))
+
+
+def depth_profile(length, intervals):
+    """
+    Profondeur de couverture de chaque position.
+    :param length: Longueur de la séquence couverte.
+    :param intervals: Intervalles (début, fin) ou (début, fin, brin), fin exclue, ex. la liste `final` d'un gène.
+    :return: `length` entiers (ndarray si NumPy est disponible, liste sinon).
+    """
+    diff = new_diff(length)
+    add_intervals(diff, intervals)
+    return depth_from_diff(diff)
+
+
+def uncovered_intervals(depth, min_depth=1):
+    """Retourne les intervalles (début, fin) dont la profondeur est inférieure à `min_depth`."""
+    if np is not None and isinstance(depth, np.ndarray):
+        # Bords des plages basses : changements de valeur du masque bordé de False.
+        low = np.concatenate(([False], depth < min_depth, [False]))
+        edges = np.flatnonzero(np.diff(low.astype(np.int8))).tolist()
+        return list(zip(edges[::2], edges[1::2]))
+    intervals = []
+    start = None
+    for i, d in enumerate(depth):
+        if d < min_depth:
+            if start is None:
+                start = i
+        elif start is not None:
+            intervals.append((start, i))
+            start = None
+    if start is not None:
+        intervals.append((start, len(depth)))
+    return intervals
+
+
+def coverage_stats(depth, thresholds=(1, 5, 10)):
+    """
+    Statistiques de profondeur : moyenne, minimum, maximum et fraction des bases couvertes
+    au moins N fois pour chaque N de `thresholds`.
+    """
+    n = len(depth)
+    if np is not None and isinstance(depth, np.ndarray):
+        stats = {
+            "length": n,
+            "mean": int(depth.sum()) / n if n else 0.0,
+            "min": int(depth.min()) if n else 0,
+            "max": int(depth.max()) if n else 0,
+        }
+        for t in thresholds:
+            stats[f">={t}x"] = int(np.count_nonzero(depth >= t)) / n if n else 0.0
+        return stats
+    stats = {
+        "length": n,
+        "mean": sum(depth) / n if n else 0.0,
+        "min": min(depth) if n else 0,
+        "max": max(depth) if n else 0,
+    }
+    for t in thresholds:
+        stats[f">={t}x"] = sum(1 for d in depth if d >= t) / n if n else 0.0
+    return stats
+
+
+def format_stats(stats):
+    """Résumé d'une ligne des statistiques de `coverage_stats`."""
+    fractions = ", ".join(f"{key} {value:.1%}" for key, value in stats.items() if key.startswith(">="))
+    return (f"profondeur moyenne {stats['mean']:.2f}, min {stats['min']}, max {stats['max']}"
+            + (f", {fractions}" if fractions else ""))
+
+
+def strand_counts(intervals):
+    """Nombre de reads placés sur chaque brin ; un intervalle sans brin compte pour le brin "+"."""
+    counts = {"+": 0, "-": 0}
+    for interval in intervals:
+        counts[interval[2] if len(interval) > 2 else "+"] += 1
+    return counts
+
+
+def format_strands(counts):
+    return f"brin + {counts['+']}, brin - {counts['-']}"
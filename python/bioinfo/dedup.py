@@ -0,0 +1,38 @@
+"""Regroupement des reads identiques avant l'alignement : chaque séquence distincte n'est alignée qu'une fois."""
+from .packed import as_str, reverse_complement as _revcomp
+
+
+class ReadGroups:
+    """
+    Reads regroupés par séquence :
+    - sequences : séquences distinctes, dans l'ordre de première apparition ;
+    - counts : nombre de reads de chaque séquence distincte ;
+    - members : pour chaque read, l'indice de sa séquence distincte ;
+    - reversed : pour chaque read, vrai s'il est le complément inverse de sa séquence distincte
+      (seulement avec reverse_complement=True).
+    """
+
+    def __init__(self, records, reverse_complement=False):
+        self.sequences = []
+        self.counts = []
+        self.members = []
+        self.reversed = []
+        seen = {}
+        for _, seq in records:
+            seq = as_str(seq)
+            key = seq
+            if reverse_complement:
+                # Un read et son complément inverse ont la même clé : la plus petite des deux séquences.
+                key = min(seq, _revcomp(seq))
+            u = seen.get(key)
+            if u is None:
+                u = seen[key] = len(self.sequences)
+                self.sequences.append(seq)
+                self.counts.append(0)
+            self.counts[u] += 1
+            self.members.append(u)
+            self.reversed.append(seq != self.sequences[u])
+
+    def __len__(self):
+        """Nombre de reads (et non de séquences distinctes)."""
+        return len(self.members)
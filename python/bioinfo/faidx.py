@@ -0,0 +1,136 @@
+"""
+Accès direct aux enregistrements d'un fichier FASTA par leur nom, à la manière de `samtools faidx`.
+
+L'index est écrit à côté du fichier (`reads.fasta.fai`), une ligne par enregistrement :
+    nom, longueur (bases), position du premier octet de la séquence,
+    bases par ligne, octets par ligne (retour à la ligne compris)
+C'est le format de `samtools faidx`, sans ligne supplémentaire : l'index est relu s'il est
+plus récent que le FASTA (comparaison des dates de modification), sinon il est reconstruit.
+"""
+import os
+
+INDEX_SUFFIX = ".fai"
+
+
+def build_index(filename):
+    """
+    Parcourt le fichier FASTA une fois et retourne l'index {nom: (longueur, offset, bases par ligne, octets par ligne)}.
+    Toutes les lignes d'une séquence, sauf la dernière, doivent avoir la même longueur.
+    """
+    with open(filename, "rb") as f:
+        if f.read(2) == b"\x1f\x8b":
+            raise ValueError(f"{filename} est compressé : l'accès direct nécessite un FASTA texte.")
+        f.seek(0)
+
+        entries = {}
+        name = None
+        offset = 0
+        for line in f:
+            if line.startswith(b">"):
+                name = line[1:].strip().decode()
+                if name in entries:
+                    raise ValueError(f"Nom en double dans {filename} : {name}")
+                # [longueur, offset, bases par ligne, octets par ligne, dernière ligne atteinte]
+                entries[name] = [0, offset + len(line), 0, 0, False]
+            elif name is not None:
+                bases = len(line.rstrip(b"\r\n"))
+                entry = entries[name]
+                if bases and (entry[4] or bases > entry[2] > 0):
+                    raise ValueError(f"Longueurs de lignes irrégulières dans {name} ({filename})")
+                if entry[2] == 0:
+                    entry[2], entry[3] = bases, len(line)
+                # Une ligne plus courte (ou vide) ne peut être que la dernière de la séquence.
+                entry[4] = bases < entry[2] or bases == 0
+                entry[0] += bases
+            offset += len(line)
+    return {name: tuple(entry[:4]) for name, entry in entries.items()}
+
+
+def _write_index(index_filename, entries):
+    with open(index_filename, "w") as f:
+        for name, (length, offset, line_bases, line_width) in entries.items():
+            f.write(f"{name}\t{length}\t{offset}\t{line_bases}\t{line_width}\n")
+
+
+def _read_index(index_filename, filename):
+    """Relit l'index s'il n'est pas plus ancien que le FASTA, sinon retourne None."""
+    try:
+        if os.stat(index_filename).st_mtime_ns < os.stat(filename).st_mtime_ns:
+            return None
+        with open(index_filename) as f:
+            entries = {}
+            for line in f:
+                name, length, offset, line_bases, line_width = line.rstrip("\n").rsplit("\t", 4)
+                entries[name] = (int(length), int(offset), int(line_bases), int(line_width))
+            return entries
+    except (OSError, ValueError):
+        return None
+
+
+class FastaIndex:
+    """
+    Index d'un fichier FASTA : récupère un enregistrement ou une sous-séquence par son nom
+    en lisant seulement les octets concernés.
+    """
+
+    def __init__(self, filename, index_filename=None):
+        self.filename = filename
+        self.index_filename = index_filename or filename + INDEX_SUFFIX
+        self._entries = _read_index(self.index_filename, filename)
+        if self._entries is None:
+            self._entries = build_index(filename)
+            try:
+                _write_index(self.index_filename, self._entries)
+            except OSError:
+                # Dossier en lecture seule : l'index reste en mémoire.
+                pass
+        self._file = open(filename, "rb")
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __contains__(self, name):
+        return name in self._entries
+
+    def __iter__(self):
+        return iter(self._entries)
+
+    def names(self, prefix=None):
+        """Noms des enregistrements, dans l'ordre du fichier, éventuellement filtrés par préfixe."""
+        return [name for name in self._entries if prefix is None or name.startswith(prefix)]
+
+    def length(self, name):
+        return self._entries[name][0]
+
+    def fetch(self, name, start=0, end=None):
+        """
+        Retourne la séquence de `name` entre les positions `start` (incluse) et `end` (exclue), 0-based.
+        :raises KeyError: si le nom n'est pas dans l'index.
+        """
+        length, offset, line_bases, line_width = self._entries[name]
+        end = length if end is None else min(end, length)
+        start = max(0, start)
+        if start >= end:
+            return ""
+        first = offset + start // line_bases * line_width + start % line_bases
+        last = offset + (end - 1) // line_bases * line_width + (end - 1) % line_bases
+        self._file.seek(first)
+        data = self._file.read(last - first + 1)
+        return data.translate(None, b"\r\n").decode("ascii")
+
+    def __getitem__(self, name):
+        return self.fetch(name)
+
+    def records(self, prefix=None):
+        """Produit les enregistrements (nom, séquence) dont le nom commence par `prefix`."""
+        for name in self.names(prefix):
+            yield name, self.fetch(name)
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
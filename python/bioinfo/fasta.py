@@ -0,0 +1,202 @@
+"""Lecture et écriture de fichiers FASTA (texte ou compressés en gzip) en flux continu."""
+import gzip
+import os
+
+from .packed import as_str
+from .store import ReadStore, is_store
+
+CHUNK_SIZE = 1 << 20
+WHITESPACE = b" \t\r\n"
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def open_binary(filename):
+    """Ouvre un fichier en binaire, en le décompressant s'il s'agit d'un fichier gzip."""
+    with open(filename, "rb") as f:
+        magic = f.read(2)
+    if magic == GZIP_MAGIC:
+        return gzip.open(filename, "rb")
+    return open(filename, "rb")
+
+
+def _record(header, parts):
+    return header, b"".join(parts).translate(None, WHITESPACE).decode("ascii")
+
+
+def read_fasta(filename, chunk_size=CHUNK_SIZE):
+    """
+    Lit un fichier FASTA et produit les enregistrements (header, sequence) un par un.
+    Le fichier est lu par blocs binaires : seule la séquence en cours est gardée en mémoire.
+    :param filename: Fichier FASTA (éventuellement compressé en gzip).
+    :param chunk_size: Taille des blocs lus (octets).
+    """
+    header = None
+    parts = []
+    # Morceaux de la ligne non terminée : ils ne sont joints qu'une fois, quand la ligne se termine
+    # (une séquence sur une seule ligne n'est pas recopiée à chaque bloc).
+    pending = []
+    with open_binary(filename) as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                block = b"".join(pending) + b"\n" if pending else b""
+            else:
+                cut = chunk.rfind(b"\n")
+                if cut == -1:
+                    pending.append(chunk)
+                    continue
+                pending.append(chunk[:cut + 1])
+                block = b"".join(pending)
+                pending = [chunk[cut + 1:]] if cut + 1 < len(chunk) else []
+
+            start = 0
+            while start < len(block):
+                if block.startswith(b">", start):
+                    eol = block.index(b"\n", start)
+                    if header is not None:
+                        yield _record(header, parts)
+                    header = block[start + 1:eol].strip().decode()
+                    parts = []
+                    start = eol + 1
+                    continue
+                nxt = block.find(b"\n>", start)
+                if nxt == -1:
+                    parts.append(block[start:])
+                    break
+                parts.append(block[start:nxt + 1])
+                start = nxt + 1
+            if header is None:
+                parts = []
+
+            if not chunk:
+                break
+    if header is not None:
+        yield _record(header, parts)
+
+
+def parse_fasta(filename, on_duplicate="error"):
+    """
+    Parse un fichier FASTA et retourne un dictionnaire {header: sequence}.
+    :param on_duplicate: Comportement si un header apparaît plusieurs fois :
+                         "error" (ValueError), "first" ou "last" (garde la première/dernière séquence).
+    """
+    if on_duplicate not in ("error", "first", "last"):
+        raise ValueError(f"on_duplicate inconnu : {on_duplicate}")
+    sequences = {}
+    for header, seq in read_fasta(filename):
+        if header in sequences:
+            if on_duplicate == "error":
+                raise ValueError(f"Header en double dans {filename} : {header}")
+            if on_duplicate == "first":
+                continue
+        sequences[header] = seq
+    return sequences
+
+
+class FastaRecords:
+    """
+    Itérable sur les enregistrements d'un fichier FASTA dont le header commence par `prefix`.
+    Le fichier est relu à chaque parcours, ce qui permet de boucler plusieurs fois
+    sur les reads sans les garder en mémoire. Un fichier binaire écrit par store.write_store
+    est aussi accepté (ouvert par mmap, sans parsing).
+    """
+
+    def __init__(self, filename, prefix=None):
+        self.filename = filename
+        self.prefix = prefix
+
+    def __iter__(self):
+        if is_store(self.filename):
+            with ReadStore(self.filename) as store:
+                yield from store.records(self.prefix)
+            return
+        for header, seq in read_fasta(self.filename):
+            if self.prefix is None or header.startswith(self.prefix):
+                yield header, seq
+
+
+class FastaWriter:
+    """
+    Écriture FASTA tamponnée : les enregistrements sont accumulés puis écrits par gros blocs.
+    Le fichier est compressé en gzip si son nom se termine par .gz.
+    """
+
+    def __init__(self, filename, line_width=80, buffer_size=CHUNK_SIZE):
+        if filename.endswith(".gz"):
+            self.f = gzip.open(filename, "wb", compresslevel=6)
+        else:
+            self.f = open(filename, "wb")
+        self.filename = filename
+        self.line_width = line_width
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.buffered = 0
+
+    def write(self, header, seq):
+        seq = as_str(seq)
+        w = self.line_width
+        lines = [seq[i:i + w] + "\n" for i in range(0, len(seq), w)]
+        record = f">{header}\n" + "".join(lines)
+        self.buffer.append(record)
+        self.buffered += len(record)
+        if self.buffered >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.f.write("".join(self.buffer).encode("ascii"))
+            self.buffer = []
+            self.buffered = 0
+
+    def close(self):
+        self.flush()
+        self.f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def shard_filenames(filename, shards):
+    """Noms des fichiers d'un découpage en `shards` parties : reads.fasta -> reads.1.fasta, reads.2.fasta, ..."""
+    if shards <= 1:
+        return [filename]
+    gz = ".gz" if filename.endswith(".gz") else ""
+    stem, ext = os.path.splitext(filename[:len(filename) - len(gz)])
+    return [f"{stem}.{i}{ext}{gz}" for i in range(1, shards + 1)]
+
+
+class ShardedFastaWriter:
+    """
+    Répartit les enregistrements à tour de rôle entre plusieurs FastaWriter.
+    `write_all` écrit un enregistrement (ex. un gène) dans chaque fichier,
+    pour que chaque partie reste un jeu de données complet.
+    """
+
+    def __init__(self, filename, shards=1, **kwargs):
+        self.writers = [FastaWriter(name, **kwargs) for name in shard_filenames(filename, shards)]
+        self.next = 0
+
+    @property
+    def filenames(self):
+        return [w.filename for w in self.writers]
+
+    def write(self, header, seq):
+        self.writers[self.next].write(header, seq)
+        self.next = (self.next + 1) % len(self.writers)
+
+    def write_all(self, header, seq):
+        for w in self.writers:
+            w.write(header, seq)
+
+    def close(self):
+        for w in self.writers:
+            w.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
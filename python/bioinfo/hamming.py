@@ -0,0 +1,233 @@
+"""
+Distances de Hamming vectorisées avec NumPy (gène et reads encodés en uint8),
+et positions triées des k-mers d'un gène pour retrouver les graines exactes (KmerPositions).
+"""
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .packed import as_str
+
+# Nombre maximal de cases (reads x fenêtres) calculées à la fois.
+BATCH_CELLS = 1 << 22
+
+
+def has_numpy():
+    return np is not None
+
+
+def encode(seq):
+    """Encode une séquence en tableau uint8 (un octet ASCII par base)."""
+    return np.frombuffer(as_str(seq).encode("ascii"), dtype=np.uint8)
+
+
+def window_mismatches(gene_arr, reads_arr):
+    """
+    Nombre de différences entre chaque read et chaque fenêtre du gène.
+    :param gene_arr: Gène encodé (n,).
+    :param reads_arr: Reads de même longueur L encodés (B, L).
+    :return: Tableau (B, n - L + 1) des distances de Hamming.
+    """
+    n_windows = len(gene_arr) - reads_arr.shape[1] + 1
+    counts = np.zeros((reads_arr.shape[0], n_windows), dtype=np.int32)
+    for j in range(reads_arr.shape[1]):
+        counts += gene_arr[j:j + n_windows][None, :] != reads_arr[:, j][:, None]
+    return counts
+
+
+def best_hamming_positions(gene, reads):
+    """
+    Pour chaque read, cherche la fenêtre du gène la plus proche au sens de Hamming.
+    Les reads sont regroupés par longueur et traités par lots.
+    :return: Liste de tuples (position, distance) dans l'ordre des reads ; (None, None)
+             si le read est plus long que le gène. En cas d'égalité, la première position est retenue.
+    """
+    gene = as_str(gene)
+    reads = [as_str(read) for read in reads]
+    results = [(None, None)] * len(reads)
+    gene_arr = encode(gene)
+    by_length = {}
+    for i, read in enumerate(reads):
+        if len(read) > len(gene):
+            continue
+        # Correspondance exacte : même résultat que l'arrêt anticipé sur une distance nulle.
+        pos = gene.find(read)
+        if pos != -1:
+            results[i] = (pos, 0)
+        else:
+            by_length.setdefault(len(read), []).append(i)
+
+    for rlen, indices in by_length.items():
+        n_windows = len(gene) - rlen + 1
+        batch = max(1, BATCH_CELLS // n_windows)
+        for b in range(0, len(indices), batch):
+            chunk = indices[b:b + batch]
+            reads_arr = np.stack([encode(reads[i]) for i in chunk])
+            counts = window_mismatches(gene_arr, reads_arr)
+            best_pos = counts.argmin(axis=1)
+            best = counts[np.arange(len(chunk)), best_pos]
+            for i, p, d in zip(chunk, best_pos.tolist(), best.tolist()):
+                results[i] = (p, d)
+    return results
+
+
+def origin_mismatches(gene, reads, positions):
+    """
+    Nombre de différences entre chaque read et la fenêtre du gène à sa position d'origine,
+    calculé en une seule opération sur la concaténation des reads.
+    :return: Liste d'entiers, dans l'ordre des reads.
+    """
+    if not reads:
+        return []
+    reads = [as_str(read) for read in reads]
+    lengths = np.fromiter((len(r) for r in reads), dtype=np.int64, count=len(reads))
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    rel = np.arange(offsets[-1]) - np.repeat(offsets[:-1], lengths)
+    windows = encode(gene)[np.repeat(np.asarray(positions, dtype=np.int64), lengths) + rel]
+    diff = (windows != encode("".join(reads))).astype(np.int32)
+    return np.add.reduceat(diff, offsets[:-1]).tolist() if len(diff) else [0] * len(reads)
+
+
+# Codage 2 bits des bases : A=00, C=01, G=10, T=11. Les séquences contenant une autre base
+# sont comparées octet par octet.
+_BASES = b"ACGT"
+_SEED_DIGITS = str.maketrans("ACGT", "0123")
+_LOW_BITS = 0x5555555555555555
+
+
+def _is_acgt(seqs):
+    return all(not seq.strip("ACGT") for seq in seqs)
+
+
+def pack_2bit(seqs):
+    """
+    Empaquette des séquences à 2 bits par base dans des mots de 64 bits (32 bases par mot).
+    :return: (mots (N, W) uint64, masque (N, W) uint64 des bases présentes : bit bas de chaque paire).
+    """
+    width = max((len(s) for s in seqs), default=0)
+    n_words = max(1, -(-width // 32))
+    lookup = np.zeros(256, dtype=np.uint64)
+    lookup[np.frombuffer(_BASES, dtype=np.uint8)] = np.arange(4, dtype=np.uint64)
+    codes = np.zeros((len(seqs), n_words * 32), dtype=np.uint64)
+    valid = np.zeros((len(seqs), n_words * 32), dtype=np.uint64)
+    for i, seq in enumerate(seqs):
+        codes[i, :len(seq)] = lookup[encode(seq)]
+        valid[i, :len(seq)] = 1
+    shifts = (2 * np.arange(32, dtype=np.uint64))[None, None, :]
+    codes = codes.reshape(len(seqs), n_words, 32)
+    valid = valid.reshape(len(seqs), n_words, 32)
+    return (np.bitwise_or.reduce(codes << shifts, axis=2),
+            np.bitwise_or.reduce(valid << shifts, axis=2))
+
+
+def _packed_matrix(queries, targets):
+    q_words, q_valid = pack_2bit(queries)
+    t_words, t_valid = pack_2bit(targets)
+    width = max(q_words.shape[1], t_words.shape[1])
+    q_words, q_valid, t_words, t_valid = (np.pad(a, ((0, 0), (0, width - a.shape[1])))
+                                          for a in (q_words, q_valid, t_words, t_valid))
+    low = np.uint64(_LOW_BITS)
+    one = np.uint64(1)
+    result = np.empty((len(queries), len(targets)), dtype=np.int64)
+    batch = max(1, BATCH_CELLS // max(1, len(targets) * width))
+    for b in range(0, len(queries), batch):
+        x = q_words[b:b + batch, None, :] ^ t_words[None, :, :]
+        diff = (x | (x >> one)) & low & q_valid[b:b + batch, None, :] & t_valid[None, :, :]
+        result[b:b + batch] = np.bitwise_count(diff).sum(axis=2)
+    return result
+
+
+def _byte_matrix(queries, targets):
+    width = max(len(s) for s in list(queries) + list(targets))
+    def padded(seqs):
+        arr = np.zeros((len(seqs), width), dtype=np.uint8)
+        for i, seq in enumerate(seqs):
+            arr[i, :len(seq)] = encode(seq)
+        return arr
+    q, t = padded(queries), padded(targets)
+    result = np.empty((len(queries), len(targets)), dtype=np.int64)
+    batch = max(1, BATCH_CELLS // max(1, len(targets) * width))
+    for b in range(0, len(queries), batch):
+        qb = q[b:b + batch, None, :]
+        tb = t[None, :, :]
+        result[b:b + batch] = ((qb != tb) & (qb != 0) & (tb != 0)).sum(axis=2)
+    return result
+
+
+def mismatch_matrix(queries, targets, unequal="count"):
+    """
+    Matrice des différences entre chaque séquence de `queries` (ex. consensus) et chaque séquence
+    de `targets` (ex. gènes), comparées position par position depuis le début.
+    Les séquences ACGT sont empaquetées à 2 bits par base et comparées par XOR + popcount.
+    :param unequal: Traitement des longueurs différentes :
+                    "count" (les bases en trop comptent comme des différences),
+                    "ignore" (seule la partie commune est comparée) ou "error" (ValueError).
+    :return: Tableau NumPy (len(queries), len(targets)) d'entiers.
+    """
+    if unequal not in ("count", "ignore", "error"):
+        raise ValueError(f"unequal inconnu : {unequal}")
+    queries, targets = [as_str(s) for s in queries], [as_str(s) for s in targets]
+    q_len = np.array([len(s) for s in queries], dtype=np.int64)
+    t_len = np.array([len(s) for s in targets], dtype=np.int64)
+    if unequal == "error" and (len(set(q_len.tolist()) | set(t_len.tolist())) > 1):
+        raise ValueError("Les séquences comparées n'ont pas toutes la même longueur.")
+    if not queries or not targets:
+        return np.zeros((len(queries), len(targets)), dtype=np.int64)
+    if hasattr(np, "bitwise_count") and _is_acgt(queries) and _is_acgt(targets):
+        result = _packed_matrix(queries, targets)
+    else:
+        result = _byte_matrix(queries, targets)
+    if unequal == "count":
+        result += np.abs(q_len[:, None] - t_len[None, :])
+    return result
+
+
+# Longueur des k-mers de KmerPositions (codés à 2 bits dans un uint64).
+SEED_K = 16
+
+
+class KmerPositions:
+    """
+    Positions de tous les k-mers d'un gène, triées par k-mer : les occurrences exactes d'une graine
+    sont retrouvées par dichotomie (np.searchsorted) au lieu de parcourir tout le gène.
+    Les k-mers contenant une base autre que ACGT ne sont pas rangés ; les graines plus courtes
+    que k ou contenant une telle base sont cherchées avec str.find.
+    """
+
+    def __init__(self, gene, k=SEED_K):
+        self.gene = as_str(gene)
+        self.k = k
+        lookup = np.full(256, 4, dtype=np.uint8)
+        lookup[np.frombuffer(_BASES, dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+        bases = lookup[encode(self.gene)]
+        n = max(0, len(bases) - k + 1)
+        codes = np.zeros(n, dtype=np.uint64)
+        valid = np.ones(n, dtype=bool)
+        for j in range(k):
+            window = bases[j:j + n]
+            valid &= window < 4
+            codes = (codes << np.uint64(2)) | (window & 3).astype(np.uint64)
+        positions = np.flatnonzero(valid)
+        codes = codes[positions]
+        # Tri stable : les positions d'un même k-mer restent croissantes.
+        order = np.argsort(codes, kind="stable")
+        self.codes = codes[order]
+        self.positions = positions[order]
+
+    def find(self, seq):
+        """Liste croissante des positions où `seq` apparaît exactement dans le gène."""
+        seq = as_str(seq)
+        gene = self.gene
+        seed = seq[:self.k]
+        if len(seed) < self.k or seed.strip("ACGT"):
+            positions = []
+            i = gene.find(seq)
+            while i != -1:
+                positions.append(i)
+                i = gene.find(seq, i + 1)
+            return positions
+        code = np.uint64(int(seed.translate(_SEED_DIGITS), 4))
+        lo = np.searchsorted(self.codes, code, "left")
+        hi = np.searchsorted(self.codes, code, "right")
+        return [pos for pos in self.positions[lo:hi].tolist() if gene.startswith(seq, pos)]
@@ -0,0 +1,167 @@
+"""Index de k-mers d'un gène pour placer des reads sans parcourir tout le gène."""
+from .packed import as_str, reverse_complement
+
+DEFAULT_K = 11
+
+
+class GeneIndex:
+    """
+    Table de hachage {k-mer: positions} construite une seule fois pour un gène.
+    Un read est placé en regardant ses k-mers dans la table puis en vérifiant
+    les quelques positions candidates, au lieu de comparer une fenêtre à chaque
+    position du gène.
+
+    Avec canonical=True, chaque k-mer est rangé sous sa forme canonique (le plus petit du k-mer
+    et de son complément inverse) avec son orientation dans le gène : une seule recherche
+    dans la table donne les candidats des deux brins (voir find_stranded).
+    """
+
+    def __init__(self, gene_seq, k=DEFAULT_K, canonical=False):
+        gene_seq = as_str(gene_seq)
+        self.gene = gene_seq
+        self.k = k
+        self.canonical = canonical
+        self.kmers = {}
+        if canonical:
+            # {k-mer canonique: [(position, vrai si le gène porte la forme canonique), ...]}
+            for i in range(len(gene_seq) - k + 1):
+                kmer = gene_seq[i:i + k]
+                key = _canonical(kmer)
+                self.kmers.setdefault(key, []).append((i, kmer == key))
+        else:
+            for i in range(len(gene_seq) - k + 1):
+                self.kmers.setdefault(gene_seq[i:i + k], []).append(i)
+
+    def find_all(self, read_seq):
+        """Retourne la liste triée de toutes les positions où `read_seq` s'aligne exactement."""
+        if self.canonical:
+            return [pos for pos, strand in self.find_stranded(read_seq) if strand == "+"]
+        read_seq = as_str(read_seq)
+        gene = self.gene
+        k = self.k
+        rlen = len(read_seq)
+        if rlen == 0 or rlen > len(gene):
+            return []
+        if rlen < k:
+            # Read plus court qu'un k-mer : recherche directe dans le gène.
+            positions = []
+            i = gene.find(read_seq)
+            while i != -1:
+                positions.append(i)
+                i = gene.find(read_seq, i + 1)
+            return positions
+
+        # Graine la plus rare parmi les k-mers disjoints du read (et le dernier).
+        best_offset = None
+        best_hits = None
+        for offset in list(range(0, rlen - k + 1, k)) + [rlen - k]:
+            hits = self.kmers.get(read_seq[offset:offset + k])
+            if hits is None:
+                return []
+            if best_hits is None or len(hits) < len(best_hits):
+                best_offset, best_hits = offset, hits
+        positions = []
+        for hit in best_hits:
+            start = hit - best_offset
+            if start >= 0 and gene.startswith(read_seq, start):
+                positions.append(start)
+        return positions
+
+    def align(self, read_seq):
+        """Retourne la première position de `read_seq` dans le gène, ou -1."""
+        positions = self.find_all(read_seq)
+        return positions[0] if positions else -1
+
+    def find_stranded(self, read_seq):
+        """
+        Positions où `read_seq` (brin "+") ou son complément inverse (brin "-") s'aligne exactement.
+        Nécessite un index canonique.
+        :return: Liste triée de tuples (position, brin).
+        """
+        if not self.canonical:
+            raise ValueError("find_stranded nécessite un GeneIndex construit avec canonical=True.")
+        read_seq = as_str(read_seq)
+        gene = self.gene
+        k = self.k
+        rlen = len(read_seq)
+        if rlen == 0 or rlen > len(gene):
+            return []
+        rc_seq = reverse_complement(read_seq)
+        if rlen < k:
+            hits = set()
+            for strand, seq in (("+", read_seq), ("-", rc_seq)):
+                i = gene.find(seq)
+                while i != -1:
+                    hits.add((i, strand))
+                    i = gene.find(seq, i + 1)
+            return _drop_palindromic(sorted(hits), read_seq == rc_seq)
+
+        best_offset = None
+        best_hits = None
+        for offset in list(range(0, rlen - k + 1, k)) + [rlen - k]:
+            hits = self.kmers.get(_canonical(read_seq[offset:offset + k]))
+            if hits is None:
+                return []
+            if best_hits is None or len(hits) < len(best_hits):
+                best_offset, best_hits = offset, hits
+        seed = read_seq[best_offset:best_offset + k]
+        seed_canonical = seed == _canonical(seed)
+        palindromic_seed = seed == reverse_complement(seed)
+        hits = set()
+        for hit, gene_canonical in best_hits:
+            # Même orientation dans le gène et dans le read : le read est sur le brin "+".
+            if gene_canonical == seed_canonical or palindromic_seed:
+                start = hit - best_offset
+                if start >= 0 and gene.startswith(read_seq, start):
+                    hits.add((start, "+"))
+            if gene_canonical != seed_canonical or palindromic_seed:
+                # Le complément inverse du read contient le k-mer à la position rlen - offset - k.
+                start = hit - (rlen - best_offset - k)
+                if start >= 0 and gene.startswith(rc_seq, start):
+                    hits.add((start, "-"))
+        return _drop_palindromic(sorted(hits), read_seq == rc_seq)
+
+    def align_stranded(self, read_seq):
+        """Retourne (position, brin) du premier alignement exact sur l'un des deux brins, ou (-1, None)."""
+        hits = self.find_stranded(read_seq)
+        return hits[0] if hits else (-1, None)
+
+
+def seed_candidates(gene_seq, read_seq, max_errors, find=None):
+    """
+    Débuts candidats d'un read à au plus `max_errors` substitutions (principe des tiroirs) :
+    le read est découpé en max_errors + 1 morceaux disjoints, dont au moins un se retrouve sans erreur
+    dans toute fenêtre assez proche. Chaque morceau est cherché dans le gène avec str.find.
+    :param find: Fonction optionnelle morceau -> positions exactes dans le gène, utilisée à la place
+                 de str.find (ex. hamming.KmerPositions.find).
+    :return: Liste triée des débuts candidats, ou None si le read a moins de max_errors + 1 bases.
+    """
+    gene_seq, read_seq = as_str(gene_seq), as_str(read_seq)
+    pieces = max_errors + 1
+    rlen = len(read_seq)
+    if rlen < pieces:
+        return None
+    starts = set()
+    for p in range(pieces):
+        offset = p * rlen // pieces
+        piece = read_seq[offset:(p + 1) * rlen // pieces]
+        if find is not None:
+            starts.update(i - offset for i in find(piece))
+            continue
+        i = gene_seq.find(piece)
+        while i != -1:
+            starts.add(i - offset)
+            i = gene_seq.find(piece, i + 1)
+    return sorted(starts)
+
+
+def _canonical(kmer):
+    rc = reverse_complement(kmer)
+    return kmer if kmer <= rc else rc
+
+
+def _drop_palindromic(hits, palindromic):
+    """Un read égal à son complément inverse n'est compté qu'une fois, sur le brin "+"."""
+    if palindromic:
+        return [hit for hit in hits if hit[1] == "+"]
+    return hits
@@ -0,0 +1,125 @@
+"""
+Index de gènes de référence pour identifier une espèce :
+table de hachage pour les correspondances exactes et signatures MinHash des k-mers
+pour retrouver les gènes les plus proches (similarité de Jaccard) sans tout comparer.
+"""
+import random
+import zlib
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from .packed import as_str
+
+DEFAULT_K = 7
+DEFAULT_HASHES = 64
+DEFAULT_BANDS = 16
+# En dessous de ce nombre de gènes, la recherche compare toute la référence (pas seulement les candidats LSH).
+EXHAUSTIVE_LIMIT = 1000
+# Nombre premier de Mersenne 2^31 - 1 : a * h + b tient sur 63 bits pour h < 2^32.
+PRIME = (1 << 31) - 1
+
+
+def kmer_hashes(seq, k):
+    """Empreintes (32 bits) des k-mers distincts de la séquence."""
+    seq = as_str(seq).encode("ascii")
+    return {zlib.crc32(seq[i:i + k]) for i in range(len(seq) - k + 1)}
+
+
+class MinHasher:
+    """Calcule les signatures MinHash : une valeur minimale par fonction de hachage (a * h + b) mod PRIME."""
+
+    def __init__(self, num_hashes=DEFAULT_HASHES, seed=0):
+        rng = random.Random(seed)
+        self.params = [(rng.randrange(1, PRIME), rng.randrange(PRIME)) for _ in range(num_hashes)]
+        if np is not None:
+            self._a = np.array([a for a, b in self.params], dtype=np.int64)
+            self._b = np.array([b for a, b in self.params], dtype=np.int64)
+
+    def signature(self, hashes):
+        """
+        :param hashes: Ensemble d'empreintes de k-mers (voir kmer_hashes).
+        :return: Tuple de len(params) minimums ; tuple de PRIME si l'ensemble est vide.
+        """
+        if not hashes:
+            return (PRIME,) * len(self.params)
+        if np is not None:
+            h = np.fromiter(hashes, dtype=np.int64, count=len(hashes))
+            return tuple(((h[:, None] * self._a + self._b) % PRIME).min(axis=0).tolist())
+        return tuple(min((a * h + b) % PRIME for h in hashes) for a, b in self.params)
+
+
+def estimate_jaccard(sig1, sig2):
+    """Proportion de minimums égaux : estimation de la similarité de Jaccard des deux ensembles de k-mers."""
+    return sum(x == y for x, y in zip(sig1, sig2)) / len(sig1)
+
+
+class ReferenceIndex:
+    """
+    Gènes de référence indexés par séquence exacte et par signature MinHash.
+    Les signatures sont découpées en `bands` bandes (LSH) : deux gènes partageant une bande
+    complète sont candidats, ce qui évite de comparer la requête à toute la référence.
+    """
+
+    def __init__(self, k=DEFAULT_K, num_hashes=DEFAULT_HASHES, bands=DEFAULT_BANDS, seed=0):
+        if num_hashes % bands:
+            raise ValueError("num_hashes doit être un multiple de bands.")
+        self.k = k
+        self.bands = bands
+        self.rows = num_hashes // bands
+        self.hasher = MinHasher(num_hashes, seed)
+        self.exact = {}
+        self.names = []
+        self.signatures = []
+        self.buckets = [{} for _ in range(bands)]
+
+    def _bands(self, sig):
+        return [sig[b * self.rows:(b + 1) * self.rows] for b in range(self.bands)]
+
+    def add(self, name, seq):
+        seq = as_str(seq)
+        self.exact.setdefault(seq, []).append(name)
+        sig = self.hasher.signature(kmer_hashes(seq, self.k))
+        idx = len(self.names)
+        self.names.append(name)
+        self.signatures.append(sig)
+        for bucket, key in zip(self.buckets, self._bands(sig)):
+            bucket.setdefault(key, []).append(idx)
+
+    @classmethod
+    def from_records(cls, records, **kwargs):
+        """Construit l'index à partir d'enregistrements (header, séquence)."""
+        index = cls(**kwargs)
+        for name, seq in records:
+            index.add(name, seq)
+        return index
+
+    def __len__(self):
+        return len(self.names)
+
+    def find_exact(self, seq):
+        """Noms des gènes identiques à la séquence (liste vide sinon)."""
+        return self.exact.get(as_str(seq), [])
+
+    def nearest(self, seq, top=5, exhaustive=None):
+        """
+        Gènes les plus proches de la séquence au sens de la similarité de Jaccard estimée.
+        :param top: Nombre de gènes retournés.
+        :param exhaustive: Si vrai, compare à tous les gènes au lieu des seuls candidats LSH.
+            Par défaut, seulement pour les références de moins de EXHAUSTIVE_LIMIT gènes.
+        :return: Liste de (nom, jaccard estimé), du plus proche au plus lointain.
+        """
+        sig = self.hasher.signature(kmer_hashes(seq, self.k))
+        if exhaustive is None:
+            exhaustive = len(self.names) < EXHAUSTIVE_LIMIT
+        if exhaustive:
+            candidates = range(len(self.names))
+        else:
+            candidates = set()
+            for bucket, key in zip(self.buckets, self._bands(sig)):
+                candidates.update(bucket.get(key, ()))
+        scored = [(estimate_jaccard(sig, self.signatures[i]), i) for i in candidates]
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [(self.names[i], score) for score, i in scored[:top]]
@@ -0,0 +1,118 @@
+"""
+Placement de reads longs et bruités par graines : minimiseurs (w, k) du gène rangés dans un index,
+chaînage des graines co-linéaires du read, puis extension avec l'alignement en bande (banded.py).
+"""
+import zlib
+from collections import deque
+
+from .banded import banded_align
+from .packed import as_str
+
+DEFAULT_K = 15
+DEFAULT_W = 10
+# Les minimiseurs présents plus souvent dans le gène sont ignorés (régions répétées).
+MAX_OCCURRENCES = 50
+# Nombre d'ancres précédentes examinées pour prolonger une chaîne.
+CHAIN_LOOKBACK = 50
+DEFAULT_ERROR_RATE = 0.15
+
+
+def kmer_hash(kmer):
+    return zlib.crc32(kmer.encode("ascii"))
+
+
+def minimizers(seq, k=DEFAULT_K, w=DEFAULT_W):
+    """
+    Minimiseurs (w, k) : le k-mer de plus petite empreinte de chaque fenêtre de w k-mers consécutifs.
+    Une séquence de moins de w k-mers a un seul minimiseur.
+    :return: Liste de (position, empreinte), positions croissantes et sans doublon.
+    """
+    seq = as_str(seq)
+    n = len(seq) - k + 1
+    if n <= 0:
+        return []
+    hashes = [kmer_hash(seq[i:i + k]) for i in range(n)]
+    w = min(w, n)
+    result = []
+    window = deque()
+    for i, h in enumerate(hashes):
+        # File des candidats de la fenêtre, empreintes croissantes.
+        while window and hashes[window[-1]] > h:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - w:
+            window.popleft()
+        if i >= w - 1:
+            pos = window[0]
+            if not result or result[-1][0] != pos:
+                result.append((pos, hashes[pos]))
+    return result
+
+
+def chain(anchors, max_gap_diff):
+    """
+    Plus longue chaîne d'ancres (position dans le read, position dans le gène) co-linéaires :
+    les deux positions croissent et l'écart entre diagonales successives reste <= max_gap_diff.
+    :return: Liste des ancres de la chaîne, dans l'ordre.
+    """
+    if not anchors:
+        return []
+    anchors = sorted(anchors, key=lambda a: (a[1], a[0]))
+    scores = [1] * len(anchors)
+    previous = [-1] * len(anchors)
+    for j, (qj, rj) in enumerate(anchors):
+        for i in range(max(0, j - CHAIN_LOOKBACK), j):
+            qi, ri = anchors[i]
+            if qi < qj and ri < rj and abs((rj - ri) - (qj - qi)) <= max_gap_diff and scores[i] + 1 > scores[j]:
+                scores[j] = scores[i] + 1
+                previous[j] = i
+    j = max(range(len(anchors)), key=scores.__getitem__)
+    best = []
+    while j != -1:
+        best.append(anchors[j])
+        j = previous[j]
+    return best[::-1]
+
+
+class MinimizerIndex:
+    """Index {empreinte du minimiseur: positions dans le gène}, construit une seule fois par gène."""
+
+    def __init__(self, gene_seq, k=DEFAULT_K, w=DEFAULT_W):
+        self.gene = as_str(gene_seq)
+        self.k = k
+        self.w = w
+        self.index = {}
+        for pos, h in minimizers(self.gene, k, w):
+            self.index.setdefault(h, []).append(pos)
+
+    def anchors(self, read_seq):
+        """Ancres (position dans le read, position dans le gène) des minimiseurs partagés."""
+        result = []
+        for q, h in minimizers(read_seq, self.k, self.w):
+            hits = self.index.get(h)
+            if hits is not None and len(hits) <= MAX_OCCURRENCES:
+                result.extend((q, r) for r in hits)
+        return result
+
+    def map(self, read_seq, max_distance=None):
+        """
+        Place le read : chaîne de graines puis alignement en bande sur la fenêtre du gène qu'elle désigne.
+        :param max_distance: Distance d'édition maximale (par défaut DEFAULT_ERROR_RATE de la longueur du read).
+        :return: (début, fin, distance, CIGAR) ou None si aucune chaîne ne s'aligne.
+        """
+        read_seq = as_str(read_seq)
+        if max_distance is None:
+            max_distance = max(1, int(len(read_seq) * DEFAULT_ERROR_RATE))
+        best = chain(self.anchors(read_seq), max_distance)
+        if not best:
+            return None
+        (q0, r0), (q1, r1) = best[0], best[-1]
+        # Les extrémités du read hors de la chaîne sont supposées sans indel.
+        start = max(0, r0 - q0)
+        end = min(len(self.gene), r1 + len(read_seq) - q1)
+        if start >= end:
+            return None
+        aligned = banded_align(read_seq, self.gene[start:end], max_distance)
+        if aligned is None:
+            return None
+        return start, end, aligned[0], aligned[1]
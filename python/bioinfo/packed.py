@@ -0,0 +1,168 @@
+"""
+Séquence d'ADN compacte : 2 bits par base (4 bases par octet) au lieu d'un caractère par base.
+Les bases autres que ACGT (N, ...) sont rangées à part, par plages (début, fin, caractère), et codées A
+dans les octets.
+"""
+import re
+from bisect import bisect_left, bisect_right
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BASES = "ACGT"
+_CODE = {b: i for i, b in enumerate(BASES)}
+# Plage d'un même caractère hors ACGT (une suite de N est une seule plage).
+_NON_ACGT = re.compile(r"([^ACGT])\1*")
+# Octet -> les 4 bases qu'il contient ; groupe de 4 bases -> octet.
+_UNPACK = ["".join(BASES[(byte >> (2 * k)) & 3] for k in range(4)) for byte in range(256)]
+_PACK = {quad: byte for byte, quad in enumerate(_UNPACK)}
+# Octet -> octet des 4 bases complémentaires en ordre inverse (complément : code XOR 3).
+_REVCOMP_BYTE = bytes(sum((3 - ((byte >> (2 * k)) & 3)) << (2 * (3 - k)) for k in range(4)) for byte in range(256))
+_COMPLEMENT = str.maketrans("ACGTNacgtn", "TGCANtgcan")
+_TO_A = str.maketrans({c: "A" for c in "NRYKMSWBDHVnrykmswbdhvacgt-."})
+
+
+def _pack(seq):
+    n = len(seq)
+    seq = seq.translate(_TO_A)
+    if np is not None and n >= 64:
+        lookup = np.zeros(256, dtype=np.uint8)
+        for b, code in _CODE.items():
+            lookup[ord(b)] = code
+        codes = np.zeros(-(-n // 4) * 4, dtype=np.uint8)
+        codes[:n] = lookup[np.frombuffer(seq.encode("ascii"), dtype=np.uint8)]
+        codes = codes.reshape(-1, 4)
+        return (codes[:, 0] | (codes[:, 1] << 2) | (codes[:, 2] << 4) | (codes[:, 3] << 6)).tobytes()
+    seq += "A" * (-n % 4)
+    return bytes(_PACK[seq[i:i + 4]] for i in range(0, len(seq), 4))
+
+
+def _runs(starts, ends, chars):
+    """Plages hors ACGT sous la forme (débuts, fins, caractères), trois tuples triés par début."""
+    return tuple(starts), tuple(ends), tuple(chars)
+
+
+_NO_RUNS = _runs((), (), ())
+
+
+class PackedSeq:
+    """
+    Séquence d'ADN empaquetée à 2 bits par base.
+    Supporte len, l'indexation, le découpage (pas de 1), l'égalité, le hachage et le
+    complément inverse directement sur les octets ; str(seq) redonne la séquence texte.
+    """
+    __slots__ = ("_data", "_length", "_exceptions")
+
+    def __init__(self, seq=""):
+        if isinstance(seq, PackedSeq):
+            self._data, self._length, self._exceptions = seq._data, seq._length, seq._exceptions
+            return
+        self._length = len(seq)
+        runs = [(m.start(), m.end(), m.group(1)) for m in _NON_ACGT.finditer(seq)]
+        self._exceptions = _runs(*zip(*runs)) if runs else _NO_RUNS
+        self._data = _pack(seq)
+
+    @classmethod
+    def _from_parts(cls, data, length, exceptions):
+        obj = cls.__new__(cls)
+        obj._data, obj._length, obj._exceptions = data, length, exceptions
+        return obj
+
+    def __len__(self):
+        return self._length
+
+    def __str__(self):
+        seq = "".join(map(_UNPACK.__getitem__, self._data))[:self._length]
+        starts, ends, chars = self._exceptions
+        if starts:
+            pieces = []
+            previous = 0
+            for start, end, c in zip(starts, ends, chars):
+                pieces.append(seq[previous:start])
+                pieces.append(c * (end - start))
+                previous = end
+            pieces.append(seq[previous:])
+            seq = "".join(pieces)
+        return seq
+
+    def __repr__(self):
+        return f"PackedSeq({str(self)!r})"
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            start, stop, step = key.indices(self._length)
+            if step != 1:
+                return PackedSeq(str(self)[key])
+            return self._slice(start, max(start, stop))
+        if key < 0:
+            key += self._length
+        if not 0 <= key < self._length:
+            raise IndexError("PackedSeq index out of range")
+        starts, ends, chars = self._exceptions
+        i = bisect_right(starts, key) - 1
+        if i >= 0 and key < ends[i]:
+            return chars[i]
+        return BASES[(self._data[key >> 2] >> (2 * (key & 3))) & 3]
+
+    def _slice(self, start, stop):
+        length = stop - start
+        if start & 3 == 0:
+            data = bytearray(self._data[start >> 2:(stop + 3) >> 2])
+        else:
+            # Seuls les octets couvrant la tranche sont décalés.
+            chunk = self._data[start >> 2:((stop + 3) >> 2) + 1]
+            value = int.from_bytes(chunk, "little") >> (2 * (start & 3))
+            data = bytearray(value.to_bytes(len(chunk), "little")[:(length + 3) >> 2])
+        if length & 3 and data:
+            data[-1] &= (1 << (2 * (length & 3))) - 1
+        starts, ends, chars = self._exceptions
+        # Plages qui chevauchent [start, stop), ramenées aux bornes de la tranche.
+        first = bisect_right(ends, start)
+        last = max(first, bisect_left(starts, stop)) if length else first
+        exceptions = _runs((max(b, start) - start for b in starts[first:last]),
+                           (min(e, stop) - start for e in ends[first:last]),
+                           chars[first:last])
+        return PackedSeq._from_parts(bytes(data), length, exceptions)
+
+    def reverse_complement(self):
+        """Complément inverse, calculé sur les octets (table par octet puis décalage du remplissage)."""
+        n = self._length
+        data = self._data.translate(_REVCOMP_BYTE)[::-1]
+        pad = -n % 4
+        if pad:
+            value = int.from_bytes(data, "little") >> (2 * pad)
+            data = value.to_bytes(len(data), "little")[:(n + 3) >> 2]
+        starts, ends, chars = self._exceptions
+        exceptions = _runs((n - e for e in reversed(ends)), (n - b for b in reversed(starts)),
+                           (c.translate(_COMPLEMENT) for c in reversed(chars)))
+        if starts:
+            # Les bases hors ACGT restent codées A (00) : le complément les a changées en T.
+            data = bytearray(data)
+            for start, end in zip(exceptions[0], exceptions[1]):
+                for pos in range(start, end):
+                    data[pos >> 2] &= ~(3 << (2 * (pos & 3))) & 0xFF
+            data = bytes(data)
+        return PackedSeq._from_parts(data, n, exceptions)
+
+    def __eq__(self, other):
+        if not isinstance(other, PackedSeq):
+            return NotImplemented
+        return (self._length == other._length and self._data == other._data
+                and self._exceptions == other._exceptions)
+
+    def __hash__(self):
+        return hash((self._length, self._data, self._exceptions))
+
+
+def as_str(seq):
+    """Retourne la séquence texte, que `seq` soit une str ou une PackedSeq."""
+    return seq if isinstance(seq, str) else str(seq)
+
+
+def reverse_complement(seq):
+    """Complément inverse d'une str ou d'une PackedSeq (même type en sortie)."""
+    if isinstance(seq, PackedSeq):
+        return seq.reverse_complement()
+    return seq.translate(_COMPLEMENT)[::-1]
@@ -0,0 +1,74 @@
+"""Répartition de la matrice gènes x reads sur plusieurs processus."""
+import multiprocessing
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+CHUNK_SIZE = 500
+
+# État propre à chaque processus de travail, fixé une seule fois par _init_worker.
+_genes = None
+_place = None
+_prepare = None
+_batch = False
+_prepared = {}
+# L'avertissement "fork indisponible" n'est affiché qu'une fois par exécution.
+_warned = False
+
+
+def _init_worker(genes, place, prepare, batch):
+    global _genes, _place, _prepare, _batch, _prepared
+    _genes, _place, _prepare, _batch, _prepared = genes, place, prepare, batch, {}
+
+
+def _target(gene_i):
+    if _prepare is None:
+        return _genes[gene_i]
+    if gene_i not in _prepared:
+        _prepared[gene_i] = _prepare(_genes[gene_i])
+    return _prepared[gene_i]
+
+
+def _run_chunk(task):
+    gene_i, chunk = task
+    target = _target(gene_i)
+    if _batch:
+        return _place(target, chunk)
+    return [_place(target, read_seq) for read_seq in chunk]
+
+
+def can_fork():
+    """Les processus sont créés par fork : les gènes et les fonctions du script n'ont pas à être réimportés."""
+    return "fork" in multiprocessing.get_all_start_methods()
+
+
+def place_reads(place, genes, reads, workers=1, prepare=None, batch=False, chunk_size=CHUNK_SIZE):
+    """
+    Applique `place` à chaque couple (gène, read) en répartissant les reads sur `workers` processus.
+    :param place: Fonction place(cible, read_seq) -> résultat, ou place(cible, [read_seq, ...]) -> liste si batch.
+    :param genes: Séquences des gènes ; elles sont transmises une seule fois à chaque processus.
+    :param reads: Séquences des reads.
+    :param prepare: Fonction optionnelle appliquée une fois par gène et par processus (ex. GeneIndex) ;
+                    son résultat est passé à `place` à la place de la séquence.
+    :return: Pour chaque gène, la liste des résultats dans l'ordre des reads.
+    """
+    global _warned
+    genes = list(genes)
+    reads = list(reads)
+    if workers > 1 and not can_fork() and not _warned:
+        _warned = True
+        # Sans fork (Windows), les processus réimporteraient les scripts de correction,
+        # qui s'exécutent dès l'import : le placement reste dans le processus principal.
+        print(f"Attention : --workers {workers} ignoré, fork indisponible sur cette plateforme "
+              "(placement dans un seul processus).", file=sys.stderr)
+    if workers <= 1 or not can_fork():
+        _init_worker(genes, place, prepare, batch)
+        tasks = [(g, reads) for g in range(len(genes))]
+        return [_run_chunk(task) for task in tasks]
+
+    tasks = [(g, reads[i:i + chunk_size]) for g in range(len(genes)) for i in range(0, len(reads), chunk_size)]
+    results = [[] for _ in genes]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("fork"),
+                             initializer=_init_worker, initargs=(genes, place, prepare, batch)) as executor:
+        for (gene_i, _), chunk_result in zip(tasks, executor.map(_run_chunk, tasks)):
+            results[gene_i].extend(chunk_result)
+    return results
@@ -0,0 +1,146 @@
+"""
+Instrumentation légère des scripts : temps par étape, compteurs et mémoire maximale (RSS),
+activée par l'option --profile. Désactivée, chaque appel se réduit à un test de booléen.
+"""
+import cProfile
+import io
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:
+    # Windows : pas de module resource, la mémoire maximale n'est pas mesurée.
+    resource = None
+
+# Nombre de fonctions affichées à partir du profil cProfile.
+TOP_FUNCTIONS = 20
+
+
+def peak_rss():
+    """Mémoire résidente maximale du processus (octets), ou None si elle n'est pas mesurable."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux donne des kilo-octets, macOS des octets.
+    return rss if sys.platform == "darwin" else rss * 1024
+
+
+class Profiler:
+    """
+    Chronomètre les étapes d'un script et additionne des compteurs.
+    Les scripts appellent mark("étape") au début de chaque étape, count("nom", n) dans les boucles,
+    puis finish() pour afficher le résumé (sur la sortie d'erreur, pour ne pas mêler les résultats).
+    Un bloc stage() est rangé sous l'étape (ou le bloc) en cours : les temps sont indexés par chemin
+    (étape, bloc, ...) et un bloc est affiché en retrait sous son parent, avec sa part du temps du parent.
+    :param enabled: Si faux, toutes les méthodes retournent immédiatement.
+    :param dump: Fichier où écrire le profil cProfile (lisible avec pstats), ou None.
+    """
+
+    def __init__(self, enabled=False, dump=None):
+        self.enabled = enabled or dump is not None
+        self.dump = dump
+        self.stages = {}
+        self.counters = {}
+        self._open = []
+        self._stage = None
+        self._stage_start = None
+        self._start = time.perf_counter()
+        self._cprofile = None
+        if dump is not None:
+            self._cprofile = cProfile.Profile()
+            self._cprofile.enable()
+
+    def mark(self, stage):
+        """Termine l'étape en cours et commence l'étape `stage`."""
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        if self._stage is not None:
+            self._add((self._stage,), now - self._stage_start)
+        self._stage, self._stage_start = stage, now
+
+    @contextmanager
+    def stage(self, name):
+        """Chronomètre un bloc : with profiler.stage("alignement"): ..."""
+        if not self.enabled:
+            yield
+            return
+        if self._open:
+            path = self._open[-1] + (name,)
+        else:
+            path = (name,) if self._stage is None else (self._stage, name)
+        self._open.append(path)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._open.pop()
+            self._add(path, time.perf_counter() - start)
+
+    def _add(self, path, seconds):
+        self.stages[path] = self.stages.get(path, 0.0) + seconds
+
+    def count(self, name, n=1):
+        if self.enabled:
+            self.counters[name] = self.counters.get(name, 0) + n
+
+    def summary(self):
+        """Résumé texte des étapes, des compteurs et de la mémoire maximale."""
+        total = time.perf_counter() - self._start
+        lines = ["=== Profil ==="]
+        self._stage_lines(lines, (), total)
+        lines.append(f"{'total':24s} {total:10.3f} s")
+        for name, value in self.counters.items():
+            lines.append(f"{name:24s} {value:10d}")
+        rss = peak_rss()
+        lines.append(f"{'mémoire max (RSS)':24s} " + (f"{rss / 2**20:10.1f} Mo" if rss is not None else "indisponible"))
+        return "\n".join(lines)
+
+    def _stage_lines(self, lines, parent, parent_seconds):
+        """Ajoute les étapes filles de `parent`, chacune suivie des siennes (en % du temps du parent)."""
+        for path, seconds in self.stages.items():
+            if path[:-1] != parent:
+                continue
+            label = "  " * len(parent) + path[-1]
+            lines.append(f"{label:24s} {seconds:10.3f} s  {seconds / parent_seconds if parent_seconds else 0.0:6.1%}")
+            self._stage_lines(lines, path, seconds)
+
+    def finish(self):
+        """Termine l'étape en cours, affiche le résumé et écrit le profil cProfile s'il est demandé."""
+        if not self.enabled:
+            return
+        self.mark(None)
+        if self._cprofile is not None:
+            self._cprofile.disable()
+            self._cprofile.dump_stats(self.dump)
+            out = io.StringIO()
+            pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(TOP_FUNCTIONS)
+            print(out.getvalue(), file=sys.stderr)
+            print(f"Profil cProfile écrit dans {self.dump}", file=sys.stderr)
+        print(self.summary(), file=sys.stderr)
+
+
+_profiler = Profiler()
+
+
+def get_profiler():
+    """Profiler courant (désactivé tant qu'un script n'en a pas créé un avec from_args)."""
+    return _profiler
+
+
+def add_arguments(parser):
+    """Ajoute les options --profile et --profile_dump à un ArgumentParser."""
+    parser.add_argument("--profile", action="store_true",
+                        help="Affiche le temps de chaque étape, les compteurs et la mémoire maximale")
+    parser.add_argument("--profile_dump", metavar="FICHIER", default=None,
+                        help="Profile aussi avec cProfile et écrit les statistiques (pstats) dans FICHIER")
+
+
+def from_args(args):
+    """Crée le Profiler demandé par les options de add_arguments et en fait le Profiler courant."""
+    global _profiler
+    _profiler = Profiler(args.profile, args.profile_dump)
+    return _profiler
@@ -0,0 +1,111 @@
+"""
+Génération vectorisée (NumPy) de gènes et de reads simulés.
+Toutes les tirages passent par un numpy.random.Generator : à graine égale, le jeu de données est identique.
+"""
+import math
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+BASES = b"ACGT"
+# Nombre de reads générés à chaque tirage.
+BLOCK = 1 << 16
+
+
+def has_numpy():
+    return np is not None
+
+
+def make_rng(seed=None):
+    """Crée le générateur aléatoire NumPy (reproductible si `seed` est fixé)."""
+    return np.random.default_rng(seed)
+
+
+def _base_codes(arr):
+    """Code 0-3 de chaque base ACGT ; 4 pour tout autre caractère."""
+    lookup = np.full(256, 4, dtype=np.uint8)
+    lookup[np.frombuffer(BASES, dtype=np.uint8)] = np.arange(4, dtype=np.uint8)
+    return lookup[arr]
+
+
+def _substitute(arr, mask, rng):
+    """Remplace les bases de `arr` désignées par `mask` par une autre base tirée uniformément."""
+    idx = np.flatnonzero(mask)
+    if len(idx) == 0:
+        return
+    codes = _base_codes(arr[idx]).astype(np.int64)
+    shift = rng.integers(1, 4, size=len(idx))
+    # Base hors ACGT : n'importe laquelle des quatre bases convient.
+    new = np.where(codes == 4, rng.integers(0, 4, size=len(idx)), (codes + shift) % 4)
+    arr[idx] = np.frombuffer(BASES, dtype=np.uint8)[new]
+
+
+def generate_random_gene(length, rng):
+    """Génère une séquence d'ADN aléatoire de la longueur spécifiée."""
+    codes = rng.integers(0, 4, size=length)
+    return np.frombuffer(BASES, dtype=np.uint8)[codes].tobytes().decode("ascii")
+
+
+def introduce_errors(seq, error_rate, rng, region=None):
+    """Introduit des substitutions avec une probabilité `error_rate` par nt, dans `region` (start, end) si donnée."""
+    arr = np.frombuffer(seq.encode("ascii"), dtype=np.uint8).copy()
+    start, end = (0, len(seq)) if region is None else (region[0], min(region[1], len(seq)))
+    mask = np.zeros(len(arr), dtype=bool)
+    if start < end:
+        mask[start:end] = rng.random(end - start) < error_rate
+    _substitute(arr, mask, rng)
+    return arr.tobytes().decode("ascii")
+
+
+def iter_read_layout(gene_length, min_read_length, max_read_length, desired_coverage, rng, block=BLOCK):
+    """
+    Positions et longueurs des reads, par blocs : d'abord un pavage systématique (chaque read
+    démarre au milieu du précédent), puis des reads placés au hasard jusqu'à la couverture désirée.
+    Produit des couples de tableaux (positions, longueurs).
+    """
+    n_sys = 0
+    pos = 0
+    while True:
+        lengths = rng.integers(min_read_length, max_read_length + 1, size=block)
+        positions = pos + np.concatenate(([0], np.cumsum(lengths // 2)[:-1]))
+        overflow = np.flatnonzero(positions + lengths > gene_length)
+        if len(overflow):
+            n = overflow[0]
+            n_sys += n
+            if n:
+                yield positions[:n], lengths[:n]
+            break
+        n_sys += block
+        yield positions, lengths
+        pos = int(positions[-1] + lengths[-1] // 2)
+
+    total_nt_reads = int(math.ceil(desired_coverage * gene_length))
+    n_total = max(n_sys, math.ceil(total_nt_reads / ((min_read_length + max_read_length) / 2)))
+    for done in range(n_sys, n_total, block):
+        n = min(block, n_total - done)
+        lengths = rng.integers(min_read_length, max_read_length + 1, size=n)
+        yield rng.integers(0, gene_length - lengths + 1), lengths
+
+
+def extract_reads(gene, positions, lengths, rng, error_rate=0.0, error_region=None):
+    """
+    Extrait les reads du gène en une seule opération sur tableau et y introduit les erreurs.
+    :return: Liste des séquences des reads.
+    """
+    gene_arr = np.frombuffer(gene.encode("ascii"), dtype=np.uint8)
+    offsets = np.concatenate(([0], np.cumsum(lengths)))
+    total = int(offsets[-1])
+    rel = np.arange(total) - np.repeat(offsets[:-1], lengths)
+    arr = gene_arr[np.repeat(positions, lengths) + rel]
+    if error_rate > 0.0:
+        start, end = (0, None) if error_region is None else error_region
+        mask = rel >= start
+        if end is not None:
+            mask &= rel < end
+        mask &= rng.random(total) < error_rate
+        _substitute(arr, mask, rng)
+    data = arr.tobytes().decode("ascii")
+    bounds = offsets.tolist()
+    return [data[bounds[i]:bounds[i + 1]] for i in range(len(lengths))]
@@ -0,0 +1,121 @@
+"""
+Stockage binaire des gènes et reads déjà parsés, ouvert par mmap sans relire le FASTA.
+
+Format (entiers non signés 64 bits, petit-boutiste) :
+    en-tête   MAGIC, nombre d'enregistrements, début des sections index et headers
+    données   séquences en ASCII (un octet par base), bout à bout, sans retour à la ligne
+    index     4 entiers par enregistrement : début et longueur de la séquence, début et longueur du header
+    headers   headers en UTF-8, bout à bout
+
+Les séquences restent en texte : lire une séquence est une simple tranche du fichier,
+sans décodage base par base.
+"""
+import mmap
+import struct
+from array import array
+
+from .packed import as_str
+
+MAGIC = b"BIOSTOR2"
+_HEADER = struct.Struct("<8s3Q")
+_FIELDS = 4
+
+
+def is_store(filename):
+    """Vrai si `filename` est un fichier au format de ce module."""
+    with open(filename, "rb") as f:
+        return f.read(len(MAGIC)) == MAGIC
+
+
+def write_store(filename, records):
+    """
+    Écrit les enregistrements (header, séquence) dans un fichier binaire.
+    Les séquences sont écrites au fil de l'eau ; seuls l'index et les headers sont gardés en mémoire.
+    :return: Nombre d'enregistrements écrits.
+    """
+    index = array("Q")
+    headers = bytearray()
+    with open(filename, "wb") as f:
+        f.write(_HEADER.pack(MAGIC, 0, 0, 0))
+        offset = _HEADER.size
+        for header, seq in records:
+            data = as_str(seq).encode("ascii")
+            encoded = header.encode("utf-8")
+            index.extend((offset, len(data), len(headers), len(encoded)))
+            headers += encoded
+            f.write(data)
+            offset += len(data)
+        # Index aligné sur 8 octets pour pouvoir le lire comme un tableau d'entiers.
+        f.write(b"\0" * (-offset % 8))
+        index_start = offset + (-offset % 8)
+        f.write(index.tobytes())
+        headers_start = index_start + len(index) * 8
+        f.write(headers)
+        f.seek(0)
+        f.write(_HEADER.pack(MAGIC, len(index) // _FIELDS, index_start, headers_start))
+    return len(index) // _FIELDS
+
+
+class ReadStore:
+    """
+    Accès par mmap à un fichier écrit par write_store : rien n'est lu tant qu'un enregistrement
+    n'est pas demandé, et plusieurs processus ouvrant le même fichier partagent le cache disque.
+    """
+
+    def __init__(self, filename):
+        self.filename = filename
+        self._file = open(filename, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, self.n, index_start, headers_start = _HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"{filename} n'est pas un fichier de reads binaire (format {MAGIC.decode()})")
+        self._index = memoryview(self._mm)[index_start:index_start + self.n * _FIELDS * 8].cast("Q")
+        self._headers_start = headers_start
+
+    def __len__(self):
+        return self.n
+
+    def header(self, i):
+        start, length = self._index[i * _FIELDS + 2], self._index[i * _FIELDS + 3]
+        start += self._headers_start
+        return self._mm[start:start + length].decode("utf-8")
+
+    def sequence(self, i):
+        """Séquence i (str), lue directement dans le fichier."""
+        start, length = self._index[i * _FIELDS], self._index[i * _FIELDS + 1]
+        return self._mm[start:start + length].decode("ascii")
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += self.n
+        if not 0 <= i < self.n:
+            raise IndexError("ReadStore index out of range")
+        return self.header(i), self.sequence(i)
+
+    def __iter__(self):
+        return self.records()
+
+    def records(self, prefix=None):
+        """Enregistrements (header, séquence) dont le header commence par `prefix`."""
+        mm = self._mm
+        headers_start = self._headers_start
+        encoded_prefix = prefix.encode("utf-8") if prefix is not None else None
+        index = self._index
+        for k in range(0, len(index), _FIELDS):
+            # Lecture champ par champ dans le mmap : l'index n'est jamais copié en mémoire.
+            h_start, h_length = index[k + 2] + headers_start, index[k + 3]
+            if encoded_prefix is not None and not mm[h_start:h_start + h_length].startswith(encoded_prefix):
+                continue
+            start, length = index[k], index[k + 1]
+            yield mm[h_start:h_start + h_length].decode("utf-8"), mm[start:start + length].decode("ascii")
+
+    def close(self):
+        self._index.release()
+        self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,31 +1,25 @@
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
+import argparse
+import os
+import sys
 
-fasta_filename = "../niv0.fasta"
-all_sequences = parse_fasta(fasta_filename)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioinfo import profiling
+from bioinfo.faidx import FastaIndex
+from bioinfo.minhash import ReferenceIndex
 
-genes = []
-for header, seq in all_sequences.items():
-    if header.startswith("Gene"):
-        genes.append((header, seq))
+parser = argparse.ArgumentParser(description="Identifie l'espèce à partir d'un gène (exercice 0).")
+parser.add_argument("--top", type=int, default=0, metavar="N",
+                    help="Affiche aussi les N espèces les plus proches (similarité de Jaccard des k-mers)")
+parser.add_argument("--k", type=int, default=7, help="Taille des k-mers des signatures MinHash")
+profiling.add_arguments(parser)
+args = parser.parse_args()
+profiler = profiling.from_args(args)
+profiler.mark("lecture")
+
+fasta_filename = "../niv0.fasta"
+# Seuls les enregistrements "Gene" sont lus, grâce à l'index du fichier.
+index = FastaIndex(fasta_filename)
 
 # =====================================
 # CHARGEMENT ET REGROUPEMENT DES GÈNES ET DES LECTURES
@@ -33,6 +27,17 @@ for header, seq in all_sequences.items():
 
 gene_niv3 = "AGATTTGCTGACCGGAACTCAGGAGTTCAGGAGTGC"
 
-for header, gene in genes:
-    if gene == gene_niv3:
-        print(f"espèce = {header}")
\ No newline at end of file
+# Table de hachage des séquences : la correspondance exacte est trouvée sans parcourir les gènes.
+reference = ReferenceIndex.from_records(index.records("Gene"), k=args.k)
+profiler.count("gènes de référence", len(reference))
+
+profiler.mark("recherche")
+for header in reference.find_exact(gene_niv3):
+    print(f"espèce = {header}")
+    profiler.count("espèces trouvées")
+
+if args.top:
+    for header, score in reference.nearest(gene_niv3, top=args.top):
+        print(f"{header}: jaccard estimé {score:.2f}")
+
+profiler.finish()
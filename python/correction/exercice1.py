@@ -1,60 +1,137 @@
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
-
-fasta_filename = "../reads.fasta"
-all_sequences = parse_fasta(fasta_filename)
-
-genes = []
-reads = []
-
-for header, seq in all_sequences.items():
-    if header.startswith("Gene"):
-        genes.append((header, seq))
-    elif header.startswith("Read"):
-        reads.append((header, seq))
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioinfo import profiling
+from bioinfo.aho_corasick import AhoCorasick
+from bioinfo.coverage import (coverage_stats, depth_profile, format_stats, format_strands, strand_counts,
+                              uncovered_intervals)
+from bioinfo.dedup import ReadGroups
+from bioinfo.fasta import FastaRecords
+from bioinfo.index import GeneIndex
+from bioinfo.packed import reverse_complement
+from bioinfo.parallel import place_reads
+
+parser = argparse.ArgumentParser(description="Aligne les reads sur les gènes (exercice 1).")
+parser.add_argument("--batch", action="store_true",
+                    help="Recherche tous les reads en un seul passage par gène (Aho-Corasick)")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Nombre de processus entre lesquels les reads sont répartis")
+parser.add_argument("--depth", action="store_true",
+                    help="Affiche la profondeur de couverture et les régions non couvertes de chaque gène")
+parser.add_argument("--dedup", action="store_true",
+                    help="Aligne une seule fois chaque séquence de read distincte")
+parser.add_argument("--strand", action="store_true",
+                    help="Cherche aussi les reads sur le brin complémentaire (index de k-mers canoniques)")
+parser.add_argument("--input", default="../reads.fasta",
+                    help="Fichier FASTA (ou fichier binaire créé par fasta_to_store.py) des gènes et des reads")
+profiling.add_arguments(parser)
+args = parser.parse_args()
+profiler = profiling.from_args(args)
+profiler.mark("lecture")
+if args.batch and args.workers > 1:
+    parser.error("--workers n'est pas disponible avec --batch")
+
+fasta_filename = args.input
+genes = list(FastaRecords(fasta_filename, "Gene"))
+reads = FastaRecords(fasta_filename, "Read")
+
+if args.dedup:
+    # Les reads identiques partagent un même indice : leur alignement n'est calculé qu'une fois.
+    # Avec --strand, un read et son complément inverse sont aussi regroupés.
+    groups = ReadGroups(reads, reverse_complement=args.strand)
+    print(f"{len(groups)} reads, {len(groups.sequences)} séquences distinctes")
+
+def read_key(i):
+    return groups.members[i] if args.dedup else i
+
+def read_sequences():
+    return groups.sequences if args.dedup else [seq for read, seq in reads]
 
 # =====================================
 # CHARGEMENT ET REGROUPEMENT DES GÈNES ET DES LECTURES
 # =====================================
 
-def align(gene_seq, read_seq):
-    for i in range((len(gene_seq)-len(read_seq))+1):
-        if gene_seq[i:i+len(read_seq)] == read_seq:
-            return i
-        else:continue
+def align(index, read_seq):
+    positions = index.find_all(read_seq)
+    if positions:
+        return positions[0]
     return -1
 
+def align_stranded(index, read_seq):
+    return index.align_stranded(read_seq)
+
+place = align_stranded if args.strand else align
+
+def make_index(gene_seq):
+    return GeneIndex(gene_seq, canonical=args.strand)
+
+def stranded_hit(first_hits, key):
+    hits = [(first_hits[(key, strand)], strand) for strand in "+-" if (key, strand) in first_hits]
+    return min(hits) if hits else (-1, None)
+
+profiler.mark("alignement")
+if args.batch:
+    automaton = AhoCorasick()
+    for i, seq_read in enumerate(read_sequences()):
+        if args.strand:
+            automaton.add(seq_read, (i, "+"))
+            rc_read = reverse_complement(seq_read)
+            if rc_read != seq_read:
+                automaton.add(rc_read, (i, "-"))
+        else:
+            automaton.add(seq_read, i)
+    automaton.build()
+elif args.workers > 1:
+    placements = place_reads(place, [seq for gene, seq in genes], read_sequences(),
+                             workers=args.workers, prepare=make_index)
+
 final = []
-for gene, seq_gen in genes:
+for g, (gene, seq_gen) in enumerate(genes):
     gene_l = []
-    for read, seq_read in reads:
+    if args.batch:
+        first_hits = automaton.first_hits(seq_gen)
+    elif args.workers <= 1:
+        index = make_index(seq_gen)
+    cache = {}
+    for i, (read, seq_read) in enumerate(reads):
+        key = read_key(i)
         aligned = -1
-        aligned = align(seq_gen, seq_read)
-        if aligned != -1:
+        if args.batch and args.strand:
+            aligned = stranded_hit(first_hits, key)
+        elif args.batch:
+            aligned = first_hits.get(key, -1)
+        elif args.workers > 1:
+            aligned = placements[g][key]
+        elif args.dedup:
+            if key not in cache:
+                cache[key] = place(index, groups.sequences[key])
+            aligned = cache[key]
+        else:
+            aligned = place(index, seq_read)
+        if args.strand:
+            aligned, strand = aligned
+            if args.dedup and groups.reversed[i] and strand is not None:
+                # Read complément inverse de sa séquence distincte : même fenêtre, brin opposé.
+                strand = "-" if strand == "+" else "+"
+            if aligned != -1:
+                gene_l.append((aligned, aligned + len(seq_read), strand))
+                print(f"gène: {gene}, read: {read}, pos: ({aligned}, {aligned + len(seq_read)}), brin: {strand}")
+        elif aligned != -1:
             gene_l.append((aligned, aligned+len(seq_read)))
             print(f"gène: {gene}, read: {read}, pos: ({aligned}, {aligned + len(seq_read)})")
+        profiler.count("reads placés" if aligned != -1 else "reads non placés")
     final.append(gene_l)
 
 print(final)
 
+if args.depth:
+    profiler.mark("couverture")
+    for (gene, seq_gen), gene_l in zip(genes, final):
+        depth = depth_profile(len(seq_gen), gene_l)
+        strands = f", {format_strands(strand_counts(gene_l))}" if args.strand else ""
+        print(f"gène: {gene}, {format_stats(coverage_stats(depth))}{strands}, non couvert: {uncovered_intervals(depth)}")
 
-
-
+profiler.finish()
@@ -1,35 +1,75 @@
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioinfo import profiling
+from bioinfo.aho_corasick import AhoCorasick
+from bioinfo.bitparallel import best_hit, edit_hits, mismatch_hits
+from bioinfo.coverage import (coverage_stats, depth_profile, format_stats, format_strands, strand_counts,
+                              uncovered_intervals)
+from bioinfo.dedup import ReadGroups
+from bioinfo.fasta import FastaRecords
+from bioinfo.index import GeneIndex
+from bioinfo.minimizer import DEFAULT_K, DEFAULT_W, MinimizerIndex
+from bioinfo.packed import reverse_complement
+from bioinfo.parallel import place_reads
 
-fasta_filename = "../reads.fasta"
-all_sequences = parse_fasta(fasta_filename)
+parser = argparse.ArgumentParser(description="Aligne les reads et les moitiés de reads sur les gènes (exercice 2).")
+parser.add_argument("--batch", action="store_true",
+                    help="Recherche tous les reads et leurs moitiés en un seul passage par gène (Aho-Corasick)")
+parser.add_argument("--max_errors", type=int, default=None,
+                    help="Aligne le read entier avec au plus K erreurs en un seul passage (bit-parallèle)")
+parser.add_argument("--edit", action="store_true",
+                    help="Avec --max_errors, compte aussi les insertions/délétions (distance d'édition)")
+parser.add_argument("--workers", type=int, default=1,
+                    help="Nombre de processus entre lesquels les reads sont répartis")
+parser.add_argument("--depth", action="store_true",
+                    help="Affiche la profondeur de couverture et les régions non couvertes de chaque gène")
+parser.add_argument("--dedup", action="store_true",
+                    help="Aligne une seule fois chaque séquence de read distincte")
+parser.add_argument("--minimizer", action="store_true",
+                    help="Place les reads longs et bruités par minimiseurs, chaînage et alignement en bande "
+                         "(distance maximale : --max_errors, sinon 15%% de la longueur du read)")
+parser.add_argument("--k", type=int, default=DEFAULT_K, help="Avec --minimizer, taille des k-mers")
+parser.add_argument("--w", type=int, default=DEFAULT_W, help="Avec --minimizer, taille des fenêtres (en k-mers)")
+parser.add_argument("--strand", action="store_true",
+                    help="Cherche aussi les reads sur le brin complémentaire (index de k-mers canoniques)")
+parser.add_argument("--input", default="../reads.fasta",
+                    help="Fichier FASTA (ou fichier binaire créé par fasta_to_store.py) des gènes et des reads")
+profiling.add_arguments(parser)
+args = parser.parse_args()
+profiler = profiling.from_args(args)
+profiler.mark("lecture")
+if args.strand and args.batch:
+    parser.error("--strand n'est pas disponible avec --batch")
+if args.minimizer and args.batch:
+    parser.error("--minimizer n'est pas disponible avec --batch")
+if args.workers > 1 and args.batch:
+    parser.error("--workers n'est pas disponible avec --batch")
+if args.max_errors is not None and args.batch:
+    parser.error("--max_errors n'est pas disponible avec --batch")
+if args.edit and (args.max_errors is None or args.minimizer):
+    parser.error("--edit nécessite --max_errors et n'est pas utilisé avec --minimizer")
 
-genes = []
-reads = []
+fasta_filename = args.input
+genes = list(FastaRecords(fasta_filename, "Gene"))
+reads = FastaRecords(fasta_filename, "Read")
 
-for header, seq in all_sequences.items():
-    if header.startswith("Gene"):
-        genes.append((header, seq))
-    elif header.startswith("Read"):
-        reads.append((header, seq))
+if args.dedup:
+    # Les reads identiques partagent un même indice : leur alignement n'est calculé qu'une fois.
+    # Un read et son complément inverse ne sont pas regroupés : la recherche par moitiés essaie
+    # d'abord la première moitié, qui n'est pas la même partie du read sur les deux brins.
+    groups = ReadGroups(reads)
+    print(f"{len(groups)} reads, {len(groups.sequences)} séquences distinctes")
+
+def read_key(i):
+    return groups.members[i] if args.dedup else i
+
+def read_sequences():
+    return groups.sequences if args.dedup else [seq for read, seq in reads]
 
 # =====================================
 # CHARGEMENT ET REGROUPEMENT DES GÈNES ET DES LECTURES
@@ -54,17 +94,157 @@ def align_half(gene_seq, read_seq):
         result = align(gene_seq, l_half)
         return first, result
 
+def place_read(gene_seq, read_seq):
+    aligned = align(gene_seq, read_seq)
+    if aligned == -1:
+        first, aligned = align_half(gene_seq, read_seq)
+        if aligned == -1:
+            return None
+        if not first:
+            aligned -= len(read_seq)//2
+    return aligned, aligned + len(read_seq)
+
+def place_read_stranded(index, read_seq):
+    hits = index.find_stranded(read_seq)
+    half = len(read_seq)//2
+    if hits:
+        start, strand = hits[0]
+    else:
+        hits = index.find_stranded(read_seq[:half])
+        if hits:
+            # Sur le brin "-", la première moitié est à la fin du complément inverse du read.
+            aligned, strand = hits[0]
+            start = aligned if strand == "+" else aligned - (len(read_seq) - half)
+        else:
+            hits = index.find_stranded(read_seq[half:])
+            if not hits:
+                return None
+            aligned, strand = hits[0]
+            start = aligned - half if strand == "+" else aligned
+    return start, start + len(read_seq), strand
+
+def align_approx(gene_seq, read_seq):
+    strands = [("+", read_seq)]
+    if args.strand:
+        strands.append(("-", reverse_complement(read_seq)))
+    best = None
+    for strand, seq in strands:
+        if args.edit:
+            hits = edit_hits(gene_seq, seq, args.max_errors)
+        else:
+            hits = mismatch_hits(gene_seq, seq, args.max_errors)
+        hit = best_hit(hits)
+        if hit is not None and (best is None or (hit[2], hit[0]) < (best[2], best[0])):
+            best = hit + (strand,)
+    if best is None:
+        return None
+    if args.strand:
+        return best[0], best[1], best[3]
+    return best[0], best[1]
+
+def align_minimizer(index, read_seq):
+    strands = [("+", read_seq)]
+    if args.strand:
+        strands.append(("-", reverse_complement(read_seq)))
+    best = None
+    for strand, seq in strands:
+        hit = index.map(seq, args.max_errors)
+        if hit is not None and (best is None or hit[2] < best[2]):
+            best = hit[:3] + (strand,)
+    if best is None:
+        return None
+    if args.strand:
+        return best[0], best[1], best[3]
+    return best[0], best[1]
+
+def place_target(gene_seq):
+    if args.minimizer:
+        return MinimizerIndex(gene_seq, args.k, args.w)
+    if args.strand and args.max_errors is None:
+        return GeneIndex(gene_seq, canonical=True)
+    return gene_seq
+
+def place(target, read_seq):
+    if args.minimizer:
+        return align_minimizer(target, read_seq)
+    if args.max_errors is not None:
+        return align_approx(target, read_seq)
+    if args.strand:
+        return place_read_stranded(target, read_seq)
+    return place_read(target, read_seq)
+
+def align_half_batch(first_hits, i):
+    result = first_hits.get(("first", i), -1)
+    if result != -1:
+        return True, result
+    return False, first_hits.get(("last", i), -1)
+
+# Placement par place() : processus multiples, reads regroupés, deux brins ou minimiseurs.
+use_place = args.workers > 1 or args.dedup or args.strand or args.minimizer
+start_time = time.perf_counter()
+n_reads = 0
+profiler.mark("alignement")
+
+if args.batch:
+    automaton = AhoCorasick()
+    for i, seq_read in enumerate(read_sequences()):
+        automaton.add(seq_read, ("read", i))
+        automaton.add(seq_read[:len(seq_read)//2], ("first", i))
+        automaton.add(seq_read[len(seq_read)//2:], ("last", i))
+    automaton.build()
+elif args.workers > 1:
+    placements = place_reads(place, [seq for gene, seq in genes], read_sequences(),
+                             workers=args.workers, prepare=place_target)
+
 final = []
-for gene, seq_gen in genes:
+for g, (gene, seq_gen) in enumerate(genes):
     gene_l = []
-    for read, seq_read in reads:
+    if args.batch:
+        first_hits = automaton.first_hits(seq_gen)
+    elif args.workers <= 1 and use_place:
+        target = place_target(seq_gen)
+    cache = {}
+    n_before = n_reads
+    for i, (read, seq_read) in enumerate(reads):
+        key = read_key(i)
+        n_reads += 1
+        if not args.batch and use_place:
+            if args.workers > 1:
+                placed = placements[g][key]
+            elif args.dedup:
+                if key not in cache:
+                    cache[key] = place(target, groups.sequences[key])
+                placed = cache[key]
+            else:
+                placed = place(target, seq_read)
+            if placed is not None and args.strand:
+                gene_l.append(placed)
+                print(f"gène: {gene}, read: {read}, pos: ({placed[0]}, {placed[1]}), brin: {placed[2]}")
+            elif placed is not None:
+                gene_l.append(placed)
+                print(f"gène: {gene}, read: {read}, pos: ({placed[0]}, {placed[1]})")
+            continue
+        if args.max_errors is not None:
+            hit = align_approx(seq_gen, seq_read)
+            if hit is not None:
+                gene_l.append((hit[0], hit[1]))
+                print(f"gène: {gene}, read: {read}, pos: ({hit[0]}, {hit[1]})")
+            continue
         aligned = -1
-        aligned = align(seq_gen, seq_read)
+        if args.batch:
+            aligned = first_hits.get(("read", key), -1)
+        else:
+            aligned = align(seq_gen, seq_read)
+            profiler.count("fenêtres comparées",
+                           aligned + 1 if aligned != -1 else max(0, len(seq_gen) - len(seq_read) + 1))
         if aligned != -1:
             gene_l.append((aligned, aligned+len(seq_read)))
             print(f"gène: {gene}, read: {read}, pos: ({aligned}, {aligned+len(seq_read)})")
         else:
-            first, aligned = align_half(seq_gen, seq_read)
+            if args.batch:
+                first, aligned = align_half_batch(first_hits, key)
+            else:
+                first, aligned = align_half(seq_gen, seq_read)
             if aligned != -1:
                 if first :
                     gene_l.append((aligned, aligned + len(seq_read)))
@@ -72,10 +252,22 @@ for gene, seq_gen in genes:
                 else:
                     gene_l.append((aligned-len(seq_read)//2, aligned - len(seq_read)//2 + len(seq_read)))
                     print(f"gène: {gene}, read: {read}, pos: ({aligned - len(seq_read)//2}, {aligned - len(seq_read)//2 + len(seq_read)})")
+    profiler.count("reads placés", len(gene_l))
+    profiler.count("reads non placés", n_reads - n_before - len(gene_l))
     final.append(gene_l)
 
 print(final)
 
+if args.minimizer:
+    elapsed = time.perf_counter() - start_time
+    print(f"Débit : {n_reads / len(genes) / elapsed if genes and elapsed else 0.0:.1f} reads/s "
+          f"({n_reads} placements read x gène en {elapsed:.2f} s)")
 
+if args.depth:
+    profiler.mark("couverture")
+    for (gene, seq_gen), gene_l in zip(genes, final):
+        depth = depth_profile(len(seq_gen), gene_l)
+        strands = f", {format_strands(strand_counts(gene_l))}" if args.strand else ""
+        print(f"gène: {gene}, {format_stats(coverage_stats(depth))}{strands}, non couvert: {uncovered_intervals(depth)}")
 
-
+profiler.finish()
@@ -1,40 +1,36 @@
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
+import argparse
+import os
+import sys
 
-fasta_filename = "../reads.fasta"
-all_sequences = parse_fasta(fasta_filename)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from bioinfo import profiling
+from bioinfo.banded import banded_align
+from bioinfo.faidx import FastaIndex
+from bioinfo.hamming import has_numpy, mismatch_matrix
 
-consensus = []
-genes = []
+parser = argparse.ArgumentParser(description="Compte les différences entre consensus et gènes (exercice 3).")
+parser.add_argument("--matrix", action="store_true",
+                    help="Compare tous les consensus à tous les gènes en un seul appel vectorisé (NumPy)")
+parser.add_argument("--edit", type=int, default=None, metavar="MAX",
+                    help="Compare aussi par distance d'édition (insertions/délétions) jusqu'à MAX, avec le CIGAR")
 
-for header, seq in all_sequences.items():
-    if header.startswith("Consensus"):
-        consensus.append((header, seq))
-    if header.startswith("Gene"):
-        genes.append((header, seq))
+parser.add_argument("--consensus", default="Consensus_Suspect", help="Nom du consensus à comparer")
+parser.add_argument("--genes", nargs=2, default=["Gene_Femme", "Gene_Homme"], metavar="GENE",
+                    help="Noms des deux gènes auxquels comparer le consensus")
+profiling.add_arguments(parser)
+args = parser.parse_args()
+profiler = profiling.from_args(args)
+profiler.mark("lecture")
+
+fasta_filename = "../reads.fasta"
+# L'index permet de lire seulement les enregistrements demandés, sans parcourir les reads.
+index = FastaIndex(fasta_filename)
 
-gene_1 = genes[-2][1]
-gene_2 = genes[-1][1]
+gene_1 = index.fetch(args.genes[0])
+gene_2 = index.fetch(args.genes[1])
 
-consensus_1 = consensus[0][1]
+consensus_1 = index.fetch(args.consensus)
 
 # =====================================
 # CHARGEMENT ET REGROUPEMENT DES GÈNES ET DES LECTURES
@@ -42,19 +38,37 @@ consensus_1 = consensus[0][1]
 
 def compare(seq1, seq2):
     error = 0
-    for i in range(len(seq1)):
+    for i in range(min(len(seq1), len(seq2))):
         if seq1[i] != seq2[i]:
             error +=1
+    # Les bases en trop de la séquence la plus longue comptent comme des différences.
+    error += abs(len(seq1) - len(seq2))
     return error
 
+profiler.mark("comparaison")
 result = compare(consensus_1, gene_1)
 print(result)
 result = compare(consensus_1, gene_2)
 print(result)
 
+if args.edit is not None:
+    profiler.mark("distance d'édition")
+    for gene_header, gene_seq in zip(args.genes, (gene_1, gene_2)):
+        result = banded_align(consensus_1, gene_seq, args.edit)
+        if result is None:
+            print(f"{gene_header}: distance d'édition > {args.edit}")
+        else:
+            print(f"{gene_header}: distance d'édition {result[0]}, CIGAR {result[1]}")
 
+if args.matrix and has_numpy():
+    profiler.mark("matrice")
+    consensus = list(index.records("Consensus"))
+    genes = list(index.records("Gene"))
+    matrix = mismatch_matrix([seq for header, seq in consensus], [seq for header, seq in genes])
+    for (header, seq), row in zip(consensus, matrix.tolist()):
+        best = min(range(len(genes)), key=row.__getitem__)
+        print(f"{header}: gène le plus proche {genes[best][0]} ({row[best]} différences)")
+elif args.matrix:
+    print("--matrix nécessite NumPy.")
 
-
-
-
-
+profiler.finish()
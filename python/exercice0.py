@@ -1,31 +1,7 @@
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
+from bioinfo.fasta import FastaRecords
 
 fasta_filename = "./niv0.fasta"
-all_sequences = parse_fasta(fasta_filename)
-
-genes = []
-for header, seq in all_sequences.items():
-    if header.startswith("Gene"):
-        genes.append((header, seq))
+genes = list(FastaRecords(fasta_filename, "Gene"))
 
 # =====================================
 # CHARGEMENT ET REGROUPEMENT DES GÈNES ET DES LECTURES
@@ -1,41 +1,15 @@
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
+from bioinfo.fasta import FastaRecords
 
 fasta_filename = "./reads.fasta"
-all_sequences = parse_fasta(fasta_filename)
-
-genes = []
-reads = []
-
-for header, seq in all_sequences.items():
-    if header.startswith("Gene"):
-        genes.append((header, seq))
-    elif header.startswith("Read"):
-        reads.append((header, seq))
+genes = list(FastaRecords(fasta_filename, "Gene"))
+reads = FastaRecords(fasta_filename, "Read")
 
 # =====================================
 # CHARGEMENT ET REGROUPEMENT DES GÈNES ET DES LECTURES
 # =====================================
 
-# print(genes)/print(reads) -> [(header, seq), (header,seq)...]
+# print(genes) -> [(header, seq), (header,seq)...]
+# for header, seq in reads: ... -> parcourt les reads (header, seq) un par un
 
 def align(gene_seq, read_seq):
     """
@@ -1,35 +1,8 @@
-def parse_fasta(filename):
-    """Parse un fichier FASTA et retourne un dictionnaire {header: sequence}."""
-    sequences = {}
-    with open(filename, 'r') as f:
-        header = None
-        seq_lines = []
-        for line in f:
-            line = line.strip()
-            if not line:
-                continue
-            if line.startswith(">"):
-                if header is not None:
-                    sequences[header] = "".join(seq_lines)
-                header = line[1:]
-                seq_lines = []
-            else:
-                seq_lines.append(line)
-        if header is not None:
-            sequences[header] = "".join(seq_lines)
-    return sequences
+from bioinfo.fasta import FastaRecords
 
 fasta_filename = "./reads.fasta"
-all_sequences = parse_fasta(fasta_filename)
-
-consensus = []
-genes = []
-
-for header, seq in all_sequences.items():
-    if header.startswith("Consensus"):
-        consensus.append((header, seq))
-    if header.startswith("Gene"):
-        genes.append((header, seq))
+consensus = list(FastaRecords(fasta_filename, "Consensus"))
+genes = list(FastaRecords(fasta_filename, "Gene"))
 
 gene_1 = genes[-2][1]
 gene_2 = genes[-1][1]
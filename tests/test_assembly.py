@@ -0,0 +1,53 @@
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "python"))
+
+from bioinfo.assembly import DEFAULT_K, assemble, majority_consensus
+
+
+def simulate(gene, rng, n_reads=300, read_length=80, error_rate=0.01):
+    reads = []
+    for _ in range(n_reads):
+        start = rng.randrange(len(gene) - read_length + 1)
+        read = list(gene[start:start + read_length])
+        for i in range(read_length):
+            if rng.random() < error_rate:
+                read[i] = rng.choice([b for b in "ACGT" if b != read[i]])
+        reads.append("".join(read))
+    return reads
+
+
+def kmers(seq, k=DEFAULT_K):
+    return {seq[i:i + k] for i in range(len(seq) - k + 1)}
+
+
+def test_contigs_of_two_genes_are_not_chimeric():
+    rng = random.Random(2)
+    # Un motif de 20 bases (plus court qu'un read, plus long qu'un k-mer) commun aux deux gènes.
+    motif = "".join(rng.choice("ACGT") for _ in range(20))
+    genes = ["".join(rng.choice("ACGT") for _ in range(1000)) + motif + "".join(rng.choice("ACGT") for _ in range(1000))
+             for _ in range(2)]
+    reads = simulate(genes[0], rng) + simulate(genes[1], rng)
+    rng.shuffle(reads)
+    # k-mers propres à chaque gène (ceux du motif commun ne désignent aucune source).
+    gene_kmers = [kmers(genes[0]) - kmers(genes[1]), kmers(genes[1]) - kmers(genes[0])]
+
+    consensus = assemble(reads)
+
+    assert consensus
+    for seq in consensus:
+        sources = [g for g, known in enumerate(gene_kmers) if kmers(seq) & known]
+        assert len(sources) == 1
+
+
+def test_majority_consensus_corrects_isolated_errors():
+    rng = random.Random(2)
+    gene = "".join(rng.choice("ACGT") for _ in range(300))
+    reads = simulate(gene, rng, n_reads=60, error_rate=0.02)
+    contig = list(gene[50:250])
+    for i in (20, 100, 180):
+        contig[i] = "A" if contig[i] != "A" else "C"
+
+    assert gene[50:250] in majority_consensus("".join(contig), reads)
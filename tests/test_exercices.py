@@ -0,0 +1,367 @@
+"""
+Options des scripts de correction : la sortie de chaque script est comparée à une référence
+calculée par force brute (toutes les fenêtres de chaque gène) sur python/reads.fasta et python/niv0.fasta.
+"""
+import os
+import re
+import subprocess
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+PYTHON_DIR = os.path.join(ROOT, "python")
+CORRECTION_DIR = os.path.join(PYTHON_DIR, "correction")
+sys.path.insert(0, PYTHON_DIR)
+
+from bioinfo.fasta import FastaWriter, read_fasta
+from bioinfo.store import write_store
+
+READS_FASTA = os.path.join(PYTHON_DIR, "reads.fasta")
+# Séquence cherchée par l'exercice 0.
+GENE_NIV3 = "AGATTTGCTGACCGGAACTCAGGAGTTCAGGAGTGC"
+COMPLEMENT = str.maketrans("ACGT", "TGCA")
+LINE = re.compile(r"gène: (\S+), read: (\S+), pos: \((-?\d+), (-?\d+)\)(?:, brin: ([+-]))?$")
+
+
+def run(script, *args):
+    """Lance un script de correction depuis son dossier et retourne sa sortie standard."""
+    result = subprocess.run([sys.executable, script, *map(str, args)], cwd=CORRECTION_DIR,
+                            capture_output=True, text=True, encoding="utf-8", check=True)
+    return result.stdout
+
+
+def placements(output):
+    """Lignes "gène: ..., read: ..., pos: (...)" de la sortie, en tuples (gène, read, début, fin, brin)."""
+    found = []
+    for line in output.splitlines():
+        match = LINE.match(line)
+        if match:
+            gene, read, start, end, strand = match.groups()
+            found.append((gene, read, int(start), int(end), strand))
+    return found
+
+
+def records(filename=READS_FASTA, prefix=None):
+    return [(header, seq) for header, seq in read_fasta(filename) if prefix is None or header.startswith(prefix)]
+
+
+def revcomp(seq):
+    return seq.translate(COMPLEMENT)[::-1]
+
+
+def hamming(a, b):
+    return sum(x != y for x, y in zip(a, b))
+
+
+def levenshtein(a, b):
+    previous = list(range(len(b) + 1))
+    for i, x in enumerate(a, 1):
+        current = [i]
+        for j, y in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return previous[-1]
+
+
+def best_edit_by_start(read, gene):
+    """Pour chaque début i du gène, plus petite distance d'édition entre le read et une fenêtre gene[i:j]."""
+    r, g = read[::-1], gene[::-1]
+    previous = [0] * (len(g) + 1)
+    for i, x in enumerate(r, 1):
+        current = [i]
+        for j, y in enumerate(g, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (x != y)))
+        previous = current
+    return [previous[len(g) - i] for i in range(len(gene) + 1)]
+
+
+def first_exact(gene, seq, strand=False):
+    """Premier (début, brin) où `seq` (ou, avec strand, son complément inverse) apparaît dans le gène."""
+    rc = revcomp(seq)
+    for i in range(len(gene) - len(seq) + 1):
+        window = gene[i:i + len(seq)]
+        if window == seq:
+            return i, "+"
+        if strand and window == rc:
+            return i, "-"
+    return None
+
+
+def exercice1_reference(genes, reads, strand=False):
+    expected = []
+    for gene, gene_seq in genes:
+        for read, read_seq in reads:
+            hit = first_exact(gene_seq, read_seq, strand)
+            if hit is not None:
+                expected.append((gene, read, hit[0], hit[0] + len(read_seq), hit[1] if strand else None))
+    return expected
+
+
+def exercice2_reference(genes, reads, strand=False):
+    expected = []
+    for gene, gene_seq in genes:
+        for read, read_seq in reads:
+            n, half = len(read_seq), len(read_seq) // 2
+            start = None
+            hit = first_exact(gene_seq, read_seq, strand)
+            if hit is not None:
+                start, s = hit
+            elif first_exact(gene_seq, read_seq[:half], strand) is not None:
+                pos, s = first_exact(gene_seq, read_seq[:half], strand)
+                start = pos if s == "+" else pos - (n - half)
+            elif first_exact(gene_seq, read_seq[half:], strand) is not None:
+                pos, s = first_exact(gene_seq, read_seq[half:], strand)
+                start = pos - half if s == "+" else pos
+            if start is not None:
+                expected.append((gene, read, start, start + n, s if strand else None))
+    return expected
+
+
+def mismatch_reference(genes, reads, max_errors, strand=False):
+    expected = []
+    for gene, gene_seq in genes:
+        for read, read_seq in reads:
+            best = None
+            for s, seq in [("+", read_seq)] + ([("-", revcomp(read_seq))] if strand else []):
+                for i in range(len(gene_seq) - len(seq) + 1):
+                    d = hamming(gene_seq[i:i + len(seq)], seq)
+                    if d <= max_errors and (best is None or (d, i) < best[:2]):
+                        best = (d, i, s)
+            if best is not None:
+                expected.append((gene, read, best[1], best[1] + len(read_seq), best[2] if strand else None))
+    return expected
+
+
+def depth_lines(output):
+    return {line.split(",")[0][len("gène: "):]: line for line in output.splitlines()
+            if line.startswith("gène: ") and "profondeur moyenne" in line}
+
+
+def expected_depth_line(length, intervals, strand=False):
+    depth = [sum(start <= i < end for start, end, *_ in intervals) for i in range(length)]
+    fractions = ", ".join(f">={t}x {sum(d >= t for d in depth) / length:.1%}" for t in (1, 5, 10))
+    line = f"profondeur moyenne {sum(depth) / length:.2f}, min {min(depth)}, max {max(depth)}, {fractions}"
+    if strand:
+        line += f", brin + {sum(s == '+' for *_, s in intervals)}, brin - {sum(s == '-' for *_, s in intervals)}"
+    uncovered = []
+    for i, d in enumerate(depth):
+        if d == 0:
+            if uncovered and uncovered[-1][1] == i:
+                uncovered[-1] = (uncovered[-1][0], i + 1)
+            else:
+                uncovered.append((i, i + 1))
+    return f"{line}, non couvert: {uncovered}"
+
+
+@pytest.fixture(scope="module")
+def genes():
+    return records(prefix="Gene")
+
+
+@pytest.fixture(scope="module")
+def reads():
+    return records(prefix="Read")
+
+
+@pytest.fixture(scope="module")
+def stranded_input(tmp_path_factory, genes, reads):
+    """Copie de reads.fasta où un read sur trois est remplacé par son complément inverse."""
+    filename = tmp_path_factory.mktemp("strand") / "reads_strand.fasta"
+    flipped = [(read, revcomp(seq) if i % 3 == 0 else seq) for i, (read, seq) in enumerate(reads)]
+    with FastaWriter(str(filename)) as writer:
+        for header, seq in genes + flipped:
+            writer.write(header, seq)
+    return filename, flipped
+
+
+@pytest.mark.parametrize("options", [[], ["--batch"], ["--workers", 2], ["--dedup"]])
+def test_exercice1_matches_brute_force(options, genes, reads):
+    output = run("exercice1.py", *options)
+    assert placements(output) == exercice1_reference(genes, reads)
+    if "--dedup" in options:
+        assert output.splitlines()[0] == f"{len(reads)} reads, {len({seq for _, seq in reads})} séquences distinctes"
+
+
+@pytest.mark.parametrize("options", [[], ["--batch"], ["--workers", 2], ["--dedup"]])
+def test_exercice1_strand(options, genes, stranded_input):
+    filename, reads = stranded_input
+    output = run("exercice1.py", "--strand", "--input", filename, *options)
+    expected = exercice1_reference(genes, reads, strand=True)
+    assert any(strand == "-" for *_, strand in expected)
+    assert placements(output) == expected
+
+
+def test_exercice1_depth(genes, reads):
+    output = run("exercice1.py", "--depth")
+    lines = depth_lines(output)
+    expected = exercice1_reference(genes, reads)
+    for gene, seq in genes:
+        intervals = [(start, end) for g, _, start, end, _ in expected if g == gene]
+        assert lines[gene] == f"gène: {gene}, {expected_depth_line(len(seq), intervals)}"
+
+
+def test_exercice1_strand_depth(genes, stranded_input):
+    filename, reads = stranded_input
+    lines = depth_lines(run("exercice1.py", "--strand", "--depth", "--input", filename))
+    expected = exercice1_reference(genes, reads, strand=True)
+    for gene, seq in genes:
+        intervals = [(start, end, s) for g, _, start, end, s in expected if g == gene]
+        assert lines[gene] == f"gène: {gene}, {expected_depth_line(len(seq), intervals, strand=True)}"
+
+
+def test_input_store(tmp_path, genes, reads):
+    store = tmp_path / "reads.store"
+    write_store(str(store), read_fasta(READS_FASTA))
+    for script in ("exercice1.py", "exercice2.py"):
+        assert run(script, "--input", store) == run(script)
+
+
+@pytest.mark.parametrize("options", [[], ["--batch"], ["--workers", 2], ["--dedup"]])
+def test_exercice2_matches_brute_force(options, genes, reads):
+    output = run("exercice2.py", *options)
+    assert placements(output) == exercice2_reference(genes, reads)
+
+
+@pytest.mark.parametrize("options", [[], ["--workers", 2], ["--dedup"]])
+def test_exercice2_strand(options, genes, stranded_input):
+    filename, reads = stranded_input
+    output = run("exercice2.py", "--strand", "--input", filename, *options)
+    assert placements(output) == exercice2_reference(genes, reads, strand=True)
+
+
+def test_exercice2_depth(genes, reads):
+    lines = depth_lines(run("exercice2.py", "--depth"))
+    expected = exercice2_reference(genes, reads)
+    for gene, seq in genes:
+        intervals = [(start, end) for g, _, start, end, _ in expected if g == gene]
+        assert lines[gene] == f"gène: {gene}, {expected_depth_line(len(seq), intervals)}"
+
+
+@pytest.mark.parametrize("max_errors", [0, 2])
+def test_exercice2_max_errors(max_errors, genes, reads):
+    output = run("exercice2.py", "--max_errors", max_errors)
+    assert placements(output) == mismatch_reference(genes, reads, max_errors)
+
+
+def test_exercice2_max_errors_strand(genes, stranded_input):
+    filename, reads = stranded_input
+    output = run("exercice2.py", "--max_errors", 2, "--strand", "--input", filename)
+    assert placements(output) == mismatch_reference(genes, reads, 2, strand=True)
+
+
+def test_exercice2_edit(genes, reads):
+    max_errors = 2
+    found = {(gene, read): (start, end) for gene, read, start, end, _ in
+             placements(run("exercice2.py", "--max_errors", max_errors, "--edit"))}
+    for gene, gene_seq in genes:
+        for read, read_seq in reads:
+            by_start = best_edit_by_start(read_seq, gene_seq)
+            best = min(by_start)
+            if best > max_errors:
+                assert (gene, read) not in found
+                continue
+            start, end = found[(gene, read)]
+            # Début de plus petite distance, et fenêtre rapportée à cette distance.
+            assert by_start[start] == best
+            assert levenshtein(read_seq, gene_seq[start:end]) == best
+
+
+@pytest.mark.parametrize("options", [[], ["--k", 11, "--w", 5]])
+def test_exercice2_minimizer(options, genes, reads):
+    output = run("exercice2.py", "--minimizer", *options)
+    sequences = dict(genes)
+    read_sequences = dict(reads)
+    found = placements(output)
+    assert found
+    for gene, read, start, end, _ in found:
+        read_seq = read_sequences[read]
+        # Distance maximale par défaut : 15 % de la longueur du read.
+        assert levenshtein(read_seq, sequences[gene][start:end]) <= max(1, int(len(read_seq) * 0.15))
+    # Les reads présents sans erreur dans un gène y sont retrouvés à la même position.
+    exact = {(gene, read): (start, end) for gene, read, start, end, _ in exercice1_reference(genes, reads)}
+    assert {(gene, read): (start, end) for gene, read, start, end, _ in found if (gene, read) in exact} == exact
+    assert re.search(r"^Débit : [\d.]+ reads/s", output, re.MULTILINE)
+
+
+def test_incompatible_options_are_rejected():
+    for script, options in [("exercice1.py", ["--batch", "--workers", "2"]),
+                            ("exercice2.py", ["--batch", "--strand"]),
+                            ("exercice2.py", ["--batch", "--max_errors", "1"]),
+                            ("exercice2.py", ["--edit"])]:
+        with pytest.raises(subprocess.CalledProcessError):
+            run(script, *options)
+
+
+def kmer_set(seq, k):
+    return {seq[i:i + k] for i in range(len(seq) - k + 1)}
+
+
+@pytest.mark.parametrize("k", [7, 5])
+def test_exercice0_top(k):
+    genes = records(os.path.join(PYTHON_DIR, "niv0.fasta"), "Gene")
+    lines = run("exercice0.py", "--top", 3, "--k", k).splitlines()
+    assert lines[0] == f"espèce = {next(header for header, seq in genes if seq == GENE_NIV3)}"
+    assert len(lines) == 4
+    jaccard = {header: len(kmer_set(seq, k) & kmer_set(GENE_NIV3, k)) / len(kmer_set(seq, k) | kmer_set(GENE_NIV3, k))
+               for header, seq in genes}
+    best = max(jaccard, key=jaccard.get)
+    assert lines[1] == f"{best}: jaccard estimé 1.00"
+    for line in lines[1:]:
+        header, score = re.match(r"(\S+): jaccard estimé ([\d.]+)$", line).groups()
+        # Estimation MinHash : proche de la similarité exacte.
+        assert abs(float(score) - jaccard[header]) <= 0.15
+
+
+def differences(seq1, seq2):
+    return hamming(seq1, seq2) + abs(len(seq1) - len(seq2))
+
+
+def test_exercice3_default_and_names():
+    sequences = dict(records())
+    assert run("exercice3.py").split() == [str(differences(sequences["Consensus_Suspect"], sequences[gene]))
+                                           for gene in ("Gene_Femme", "Gene_Homme")]
+    names = ["Gene_Cheveux_blond", "Gene_Cheveux_brun", "Gene_Cheveux_roux"]
+    output = run("exercice3.py", "--consensus", names[0], "--genes", *names[1:])
+    assert output.split() == [str(differences(sequences[names[0]], sequences[gene])) for gene in names[1:]]
+
+
+@pytest.mark.parametrize("max_distance", [10, 60])
+def test_exercice3_edit(max_distance):
+    sequences = dict(records())
+    names = ["Gene_Cheveux_blond", "Gene_Cheveux_brun", "Gene_Cheveux_roux"]
+    lines = run("exercice3.py", "--consensus", names[0], "--genes", *names[1:], "--edit", max_distance).splitlines()[2:]
+    query = sequences[names[0]]
+    for gene, line in zip(names[1:], lines):
+        ref = sequences[gene]
+        distance = levenshtein(query, ref)
+        if distance > max_distance:
+            assert line == f"{gene}: distance d'édition > {max_distance}"
+            continue
+        match = re.match(rf"{gene}: distance d'édition (\d+), CIGAR ((?:\d+[MID])+)$", line)
+        assert int(match.group(1)) == distance
+        # Le CIGAR décrit un alignement de coût `distance` entre le consensus et le gène.
+        i = j = cost = 0
+        for n, op in re.findall(r"(\d+)([MID])", match.group(2)):
+            n = int(n)
+            if op == "M":
+                cost += hamming(query[i:i + n], ref[j:j + n])
+                i, j = i + n, j + n
+            elif op == "I":
+                cost, i = cost + n, i + n
+            else:
+                cost, j = cost + n, j + n
+        assert (i, j, cost) == (len(query), len(ref), distance)
+
+
+def test_exercice3_matrix():
+    pytest.importorskip("numpy")
+    consensus = records(prefix="Consensus")
+    genes = records(prefix="Gene")
+    lines = run("exercice3.py", "--matrix").splitlines()[2:]
+    expected = []
+    for header, seq in consensus:
+        row = [differences(seq, gene_seq) for _, gene_seq in genes]
+        best = row.index(min(row))
+        expected.append(f"{header}: gène le plus proche {genes[best][0]} ({row[best]} différences)")
+    assert lines == expected